@@ -20,7 +20,35 @@ CREATE_LICENSE = os.environ.get("CREATE_LICENSE")
 RETRIEVE_FILE = os.environ.get("RETRIEVE_FILE")
 USER_ROLE_MANAGEMENT = os.environ.get("USER_ROLE_MANAGEMENT")
 
+COMPACT_CLAIMS = os.environ.get("COMPACT_CLAIMS", "false").lower() == "true"
+
 LDAP_PASSWORD = os.environ.get("LDAP_PASSWORD")
 
 PUBLIC_KEY = os.environ.get("AdvanceEngPublic")
 PRIVATE_KEY = os.environ.get("AdvanceEngPrivate")
+
+SERVICE_NAME = os.environ.get("SERVICE_NAME", "auth")
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 2048))
+TRACE_FILE = os.environ.get("TRACE_FILE")
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED",
+                                       "true").lower() == "true"
+DIAGNOSTICS_ENABLED = os.environ.get("DIAGNOSTICS_ENABLED",
+                                     "false").lower() == "true"
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_THREAD_THRESHOLD = int(
+    os.environ.get("COMPRESSION_THREAD_THRESHOLD", 256 * 1024))
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0)) or \
+    len(os.sched_getaffinity(0))
+SERVER_LOOP = os.environ.get("SERVER_LOOP", "uvloop")
+SERVER_HTTP = os.environ.get("SERVER_HTTP", "httptools")
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 10000))
+SERVER_MAX_REQUESTS_JITTER = int(
+    os.environ.get("SERVER_MAX_REQUESTS_JITTER", 1000))
+SERVER_RELOAD = os.environ.get("SERVER_RELOAD", "false").lower() == "true"
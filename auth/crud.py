@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import os
 import re
 from typing import List
@@ -14,6 +15,7 @@ from sqlalchemy.orm.attributes import flag_modified
 
 from models import User, Role, Access
 from schemas import UserCreate, RoleCreate, UserBase
+from tracing import span
 
 load_dotenv()
 
@@ -99,8 +101,9 @@ def decrypt_password(encrypted_password: str, private_key):
 
 def hash_password(password: str):
     try:
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
+        with span("bcrypt.hashpw"):
+            salt = bcrypt.gensalt()
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed_password.decode('utf-8')
     except Exception as e:
         raise HTTPException(status_code=401,
@@ -221,6 +224,23 @@ def get_accesses(db: Session):
     return db.query(Access).all()
 
 
+def get_access_catalogue(db: Session):
+    accesses = db.query(Access).order_by(Access.id).all()
+    catalogue = {access.name: access.id for access in accesses}
+    fingerprint = ",".join(f"{access.id}:{access.name}" for access in accesses)
+    version = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+    return {"version": version, "accesses": catalogue}
+
+
+def encode_access_mask(catalogue: dict, accesses: List[str]) -> int:
+    mask = 0
+    for name in accesses:
+        access_id = catalogue["accesses"].get(name)
+        if access_id is not None:
+            mask |= 1 << access_id
+    return mask
+
+
 def change_role_accesses(db: Session, role_id: int, access_id: int,
                          has_access: bool):
     role = db.query(Role).filter(Role.id == role_id).first()
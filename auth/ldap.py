@@ -8,6 +8,7 @@ from ldap3 import Server, Connection, SUBTREE, ALL
 
 from schemas import AccessEntries, UserLDAP, UserCreate
 from models import Access, User, Role
+from tracing import span
 
 load_dotenv()
 
@@ -40,10 +41,12 @@ def is_valid_credentials(conn, user_password) -> tuple[bool, UserLDAP]:
         cn, login = get_user_cn(conn)
         user_email = get_user_email_cn(conn)
         new_conn = create_connection(cn, user_password)
-        return new_conn.bind(), UserLDAP(username=cn,
-                                         login=login,
-                                         email=user_email,
-                                         password=user_password)
+        with span("ldap.bind"):
+            is_bound = new_conn.bind()
+        return is_bound, UserLDAP(username=cn,
+                                  login=login,
+                                  email=user_email,
+                                  password=user_password)
     else:
         return False, UserLDAP(username='', login='', email=None,
                                password=user_password)
@@ -51,8 +54,10 @@ def is_valid_credentials(conn, user_password) -> tuple[bool, UserLDAP]:
 
 def get_auth_by_db(user, user_password, db):
     ae = AccessEntries(is_auth=False, accesses=[], role='')
-    if bcrypt.checkpw(user_password.encode("utf-8"),
-                      user.password.encode("utf-8")):
+    with span("bcrypt.checkpw"):
+        is_valid = bcrypt.checkpw(user_password.encode("utf-8"),
+                                  user.password.encode("utf-8"))
+    if is_valid:
         roles = db.query(Role).filter(Role.name.in_(user.roles)).all()
         role_names = [role.name for role in roles]
         user_accesses = []
@@ -75,15 +80,17 @@ def get_auth_by_ldap(user_name: str, user_password: str, db) -> AccessEntries:
     conn = create_connection(os.getenv("LDAP_USER"),
                              os.getenv("LDAP_PASSWORD"),
                              )
-    conn.bind()
+    with span("ldap.bind"):
+        conn.bind()
     try:
         search_filter = f"(sAMAccountName={user_name})"
-        conn.search(
-            search_base=os.getenv("LDAP_SEARCH_BASE"),
-            search_filter=search_filter,
-            search_scope=SUBTREE,
-            attributes=["userPrincipalName", "mail"],
-        )
+        with span("ldap.search"):
+            conn.search(
+                search_base=os.getenv("LDAP_SEARCH_BASE"),
+                search_filter=search_filter,
+                search_scope=SUBTREE,
+                attributes=["userPrincipalName", "mail"],
+            )
         credentials_ldap, user_ldap = is_valid_credentials(conn, user_password)
         if credentials_ldap:
             e = exist_user_in_system(user_ldap, db)
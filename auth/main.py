@@ -5,16 +5,29 @@ from typing import List
 import jwt
 from fastapi import FastAPI, Depends
 from fastapi import HTTPException, APIRouter
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from loguru import logger
 from sqlalchemy.orm import Session
 
 import crud
 import schemas
+from compression import CompressionMiddleware
+from config import COMPACT_CLAIMS, DIAGNOSTICS_ENABLED
 from ldap import authenticate
+from metrics import MetricsMiddleware, metrics_response, register_engines
+from server_timing import ServerTimingMiddleware
+from tracing import TracingMiddleware, exporter, instrument_engine
 from models import SessionLocal, engine, Base
 
-app = FastAPI(title="AdminService")
+app = FastAPI(title="AdminService", default_response_class=ORJSONResponse)
+diagnostics = APIRouter()
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+register_engines(users=engine)
+instrument_engine(engine)
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
@@ -35,6 +48,25 @@ async def startup():
     Base.metadata.create_all(bind=engine)
 
 
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@diagnostics.get("/metrics")
+def read_metrics():
+    return metrics_response()
+
+
+@diagnostics.get("/debug/traces")
+def read_traces(trace_id: str | None = None):
+    return exporter.recent(trace_id)
+
+
+if DIAGNOSTICS_ENABLED:
+    app.include_router(diagnostics)
+
+
 @app.post("/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends(),
                 db: Session = Depends(get_db)):
@@ -45,13 +77,16 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(),
     if auth:
         username = form_data.username
         logger.bind(user=username).info("В систему вошел пользователь")
-        claims = accesses
-
         token_data = {
             "sub": username,
             "exp": datetime.now(timezone.utc) + timedelta(hours=3),
-            "claims": claims,
         }
+        if COMPACT_CLAIMS:
+            catalogue = crud.get_access_catalogue(db)
+            token_data["acl"] = crud.encode_access_mask(catalogue, accesses)
+            token_data["acl_v"] = catalogue["version"]
+        else:
+            token_data["claims"] = accesses
         access_token = jwt.encode(token_data, os.getenv("SECRET_KEY"),
                                   algorithm="HS256")
         return {
@@ -155,6 +190,11 @@ def read_accesses(db: Session = Depends(get_db)):
     return accesses
 
 
+@app.get("/accesses/catalogue")
+def read_access_catalogue(db: Session = Depends(get_db)):
+    return crud.get_access_catalogue(db)
+
+
 @app.patch("/roles/{role_id}", response_model=schemas.Role)
 def change_role_accesses(access_to_role: schemas.Access_to_Role,
                          db: Session = Depends(get_db)):
@@ -0,0 +1,115 @@
+"""Per-request encoding cost: legacy crud helpers vs compiled forwarding plans.
+
+The legacy functions are copied from gateway/crud.py as they were before
+routes were compiled into ForwardingPlan objects. Each case runs the work
+gateway_router does per request to build the upstream URL and body,
+including the tracing spans around it.
+
+    python benchmarks/forwarding_plan.py
+"""
+import os
+import sys
+import timeit
+import urllib.parse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY_DIR = os.path.join(ROOT_DIR, "gateway")
+sys.path[:0] = [GATEWAY_DIR, os.path.join(ROOT_DIR, "common")]
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from aiohttp.formdata import FormData  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+from dto.license import SoftwareCreate  # noqa: E402
+from forwarding import ForwardingPlan  # noqa: E402
+from tracing import span  # noqa: E402
+
+SERVICE_URL = "http://license:8000"
+
+
+def legacy_form_data(kwargs, payload, payload_key):
+    data = {}
+    try:
+        if payload_key == "form_data":
+            data = FormData()
+            data.add_field("username", payload.username)
+            data.add_field("password", payload.password)
+        elif payload_key == "id":
+            data = {payload_key: payload}
+        else:
+            data = payload.__dict__ if payload else {}
+
+        return data
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def legacy_form_url(service_url: str, path: str, query_params: dict) -> str:
+    url = f"{service_url}{path}"
+    if query_params and path != "/token":
+        del query_params["token"]
+        query_string = urllib.parse.urlencode(query_params)
+        url = f"{url}?{query_string}"
+
+    return url
+
+
+def legacy(path, payload_key, kwargs):
+    kwargs = dict(kwargs)
+    with span("crud.form_url"):
+        url = legacy_form_url(SERVICE_URL, path, kwargs)
+    payload = kwargs.get(payload_key)
+    with span("crud.form_data", payload_key=payload_key):
+        data = legacy_form_data(kwargs, payload, payload_key)
+    return url, data
+
+
+def compiled(plan, path, kwargs):
+    kwargs = dict(kwargs)
+    with span("crud.encode"):
+        url = plan.url(path, kwargs)
+        data = plan.body(kwargs)
+    return url, data
+
+
+async def get_all_licenses(token, request, response):
+    pass
+
+
+async def find_license(id: int, token, request, response):
+    pass
+
+
+async def create_software(token, request, response,
+                          software: SoftwareCreate):
+    pass
+
+
+CASES = [
+    ("GET /all_licenses", get_all_licenses, "get", "/all_licenses", None,
+     {"token": "t"}),
+    ("GET /license/{id}", find_license, "get", "/license/42", None,
+     {"id": 42, "token": "t"}),
+    ("POST /software", create_software, "post", "/software", "software",
+     {"token": "t",
+      "software": SoftwareCreate(company_name="x",
+                                 required_attributes=["a", "b"])}),
+]
+
+
+def main():
+    number = 20000
+    print(f"{'route':<20}{'legacy us':>11}{'plan us':>10}{'saved':>8}")
+    for name, endpoint, method, path, payload_key, kwargs in CASES:
+        plan = ForwardingPlan(SERVICE_URL, method, endpoint, payload_key,
+                              None, False)
+        before = min(timeit.repeat(lambda: legacy(path, payload_key, kwargs),
+                                   number=number, repeat=5)) / number
+        after = min(timeit.repeat(lambda: compiled(plan, path, kwargs),
+                                  number=number, repeat=5)) / number
+        print(f"{name:<20}{before * 1e6:>11.2f}{after * 1e6:>10.2f}"
+              f"{1 - after / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Gateway throughput: development launch vs the production server profile.
+
+Starts stub auth/license upstreams, launches the gateway either the old way
+(`uvicorn --reload`, asyncio loop, h11 parser, one process) or through
+`gunicorn -c gunicorn_conf.py`, and drives GET /all_licenses at a fixed
+concurrency.
+
+    python benchmarks/gateway_throughput.py --mode dev --mode prod
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+import jwt
+from aiohttp import web
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY_DIR = os.path.join(ROOT_DIR, "gateway")
+SECRET_KEY = "benchmark"
+AUTH_PORT = 18101
+LICENSE_PORT = 18102
+GATEWAY_PORT = 18100
+LICENSES = [{"id": i, "company_name": f"company {i}",
+             "product_name": "product", "license_users_count": 10}
+            for i in range(50)]
+
+
+def serve_upstreams():
+    async def catalogue(request):
+        return web.json_response({"version": "v1",
+                                  "accesses": {"READ_LICENSE": 1}})
+
+    async def health(request):
+        return web.json_response({"status": "ok"})
+
+    async def all_licenses(request):
+        await asyncio.sleep(0.002)
+        return web.json_response(LICENSES)
+
+    async def main():
+        auth = web.Application()
+        auth.add_routes([web.get("/accesses/catalogue", catalogue),
+                         web.get("/health", health)])
+        license = web.Application()
+        license.add_routes([web.get("/all_licenses", all_licenses),
+                            web.get("/health", health)])
+        for app, port in ((auth, AUTH_PORT), (license, LICENSE_PORT)):
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def launch(mode: str, workers: int) -> subprocess.Popen:
+    env = {**os.environ,
+           "AUTH_SERVICE_URL": f"http://127.0.0.1:{AUTH_PORT}",
+           "LICENSE_SERVICE_URL": f"http://127.0.0.1:{LICENSE_PORT}",
+           "SECRET_KEY": SECRET_KEY,
+           "TRACING_ENABLED": "false",
+           "SERVER_HOST": "127.0.0.1",
+           "SERVER_PORT": str(GATEWAY_PORT),
+           "SERVER_WORKERS": str(workers),
+           "PYTHONPATH": os.path.join(ROOT_DIR, "common")}
+    if mode == "dev":
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--reload",
+                   "--loop", "asyncio", "--http", "h11",
+                   "--host", "127.0.0.1", "--port", str(GATEWAY_PORT),
+                   "--no-access-log"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c",
+                   "gunicorn_conf.py", "--access-logfile", "/dev/null"]
+    process = subprocess.Popen(command, cwd=GATEWAY_DIR, env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", GATEWAY_PORT), 0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gateway did not start in {mode} mode")
+
+
+async def load(concurrency: int, duration: float) -> dict:
+    token = jwt.encode({"sub": "bench", "exp": time.time() + 3600,
+                        "claims": ["READ_LICENSE"]},
+                       SECRET_KEY, algorithm="HS256")
+    url = f"http://127.0.0.1:{GATEWAY_PORT}/all_licenses"
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    errors = 0
+
+    async def client(session):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            started_at = time.perf_counter()
+            async with session.get(url, headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with session.get(url, headers=headers) as response:
+            await response.read()
+        stop_at = time.monotonic() + duration
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    latencies.sort()
+    return {"requests": len(latencies),
+            "rps": len(latencies) / duration,
+            "p50": statistics.median(latencies) * 1000,
+            "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+            "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", action="append", choices=("dev", "prod"))
+    parser.add_argument("--workers", type=int,
+                        default=len(os.sched_getaffinity(0)))
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    upstreams = multiprocessing.Process(target=serve_upstreams, daemon=True)
+    upstreams.start()
+    print(f"{'mode':<6}{'workers':>8}{'req/s':>10}{'p50 ms':>9}"
+          f"{'p99 ms':>9}{'errors':>8}")
+    for mode in args.mode or ("dev", "prod"):
+        workers = 1 if mode == "dev" else args.workers
+        process = launch(mode, workers)
+        try:
+            result = asyncio.run(load(args.concurrency, args.duration))
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{mode:<6}{workers:>8}{result['rps']:>10.0f}"
+              f"{result['p50']:>9.1f}{result['p99']:>9.1f}"
+              f"{result['errors']:>8}")
+    upstreams.terminate()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
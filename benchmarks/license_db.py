@@ -0,0 +1,161 @@
+"""License service database path: sync Session in the threadpool vs AsyncSession.
+
+Builds two copies of GET /software/{id}. The first uses the old endpoint
+shape: a sync `def` with a psycopg2 Session, run in AnyIO's threadpool. The
+second uses the current shape: an `async def` with an asyncpg AsyncSession.
+Both engines get the same pool settings from license/config.py. The script
+drives both copies in-process at a fixed concurrency. --db-latency adds a
+pg_sleep to each request, to stand in for the network hop to a remote
+Postgres.
+
+    DB_USER=postgres DB_PASS=... DB_HOST=127.0.0.1 DB_PORT=5432 DB_NAME=postgres \\
+        python benchmarks/license_db.py --concurrency 200 --db-latency 0.005
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSE_DIR = os.path.join(ROOT_DIR, "license")
+sys.path[:0] = [LICENSE_DIR, os.path.join(ROOT_DIR, "common")]
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+import config  # noqa: E402
+from dto.license_dto import SoftwareResponse  # noqa: E402
+from models import AsyncSessionLocal, Software, async_engine, \
+    async_session, sqlite_database  # noqa: E402
+
+sync_engine = create_engine(sqlite_database, pool_pre_ping=True,
+                            pool_size=config.DB_POOL_SIZE,
+                            max_overflow=config.DB_MAX_OVERFLOW,
+                            pool_timeout=config.DB_POOL_TIMEOUT)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False,
+                            bind=sync_engine)
+
+
+def build_apps(db_latency: float) -> dict[str, FastAPI]:
+    sync_app = FastAPI()
+    async_app = FastAPI()
+    admitted_app = FastAPI()
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    async def get_admitted_db():
+        async with async_session() as db:
+            yield db
+
+    @sync_app.get("/software/{software_id}")
+    def get_software_sync(software_id: int,
+                          db: Session = Depends(get_sync_db)):
+        if db_latency:
+            db.execute(text("select pg_sleep(:s)"), {"s": db_latency})
+        software = db.query(Software).filter(
+            Software.id == software_id).first()
+        return SoftwareResponse.model_validate(software)
+
+    async def get_software_async(software_id: int, db: AsyncSession):
+        if db_latency:
+            await db.execute(text("select pg_sleep(:s)"), {"s": db_latency})
+        software = await db.get(Software, software_id)
+        return SoftwareResponse.model_validate(software)
+
+    @async_app.get("/software/{software_id}")
+    async def get_software_unbounded(
+            software_id: int, db: AsyncSession = Depends(get_async_db)):
+        return await get_software_async(software_id, db)
+
+    @admitted_app.get("/software/{software_id}")
+    async def get_software_admitted(
+            software_id: int, db: AsyncSession = Depends(get_admitted_db)):
+        return await get_software_async(software_id, db)
+
+    return {"sync": sync_app, "async": async_app, "admitted": admitted_app}
+
+
+async def seed() -> int:
+    async with AsyncSessionLocal() as db:
+        software = Software(company_name="benchmark",
+                            required_attributes=["serial", "host"])
+        db.add(software)
+        await db.commit()
+        return software.id
+
+
+async def cleanup(software_id: int):
+    async with AsyncSessionLocal() as db:
+        await db.delete(await db.get(Software, software_id))
+        await db.commit()
+
+
+async def load(app: FastAPI, url: str, concurrency: int,
+               duration: float) -> dict:
+    latencies = []
+    errors = 0
+
+    async def client(session):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            started_at = time.perf_counter()
+            response = await session.get(url)
+            if response.status_code != 200:
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as session:
+        await session.get(url)
+        stop_at = time.monotonic() + duration
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    latencies.sort()
+    return {"rps": len(latencies) / duration,
+            "p50": statistics.median(latencies) * 1000,
+            "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+            "errors": errors}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--db-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    software_id = await seed()
+    apps = build_apps(args.db_latency)
+    print(f"pool_size={config.DB_POOL_SIZE} "
+          f"max_overflow={config.DB_MAX_OVERFLOW} "
+          f"concurrency={args.concurrency} db_latency={args.db_latency}s")
+    print(f"{'path':<9}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    try:
+        for name, app in apps.items():
+            result = await load(app, f"/software/{software_id}",
+                                args.concurrency, args.duration)
+            print(f"{name:<9}{result['rps']:>9.0f}{result['p50']:>9.1f}"
+                  f"{result['p99']:>9.1f}{result['errors']:>8}")
+            sync_engine.dispose()
+    finally:
+        await cleanup(software_id)
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""Per-request file work in /generate_license: legacy pipeline vs single pass.
+
+The legacy functions are copied from license/crud.py as they were before
+generation moved in memory. The legacy path streams the upload to disk,
+re-reads it to get the product key, writes the license, and reads it back
+for the FileResponse. The single-pass path reads the upload once, builds
+the license bytes once, and writes each file once. The timed work does
+not touch the database:
+
+    python benchmarks/license_generation.py --digest-size 4096
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LICENSE_DIR = os.path.join(ROOT_DIR, "license")
+sys.path[:0] = [LICENSE_DIR, os.path.join(ROOT_DIR, "common")]
+
+import crud  # noqa: E402
+from conditional import etag_for, format_etag  # noqa: E402
+from dto.license_dto import LicensesInfo  # noqa: E402
+from tracing import span  # noqa: E402
+
+
+class Upload:
+    def __init__(self, content: bytes):
+        self.file = SpooledTemporaryFile(max_size=1024 * 1024)
+        self.file.write(content)
+        self.file.seek(0)
+
+    def read(self) -> bytes:
+        return self.file.read()
+
+
+def legacy_save_machine_digest_file(machine_digest_file,
+                                    machine_digest_file_name):
+    path = f"files/machine_digest_files/{machine_digest_file_name}"
+    digest = hashlib.sha256()
+    with span("file.write", path=path), open(path, "wb+") as buffer:
+        while chunk := machine_digest_file.file.read(64 * 1024):
+            digest.update(chunk)
+            buffer.write(chunk)
+    return format_etag(digest)
+
+
+def legacy_save_license_file(lic, license_path, machine_digest_file_name):
+    path = f"files/machine_digest_files/{machine_digest_file_name}"
+    with span("file.read", path=path):
+        product_key = open(path, "r", encoding="utf-8").read()
+
+    license_data = {
+        "company": lic.company_name,
+        "product_name": lic.product_name,
+        "license_users_count": lic.license_users_count,
+        "exp_time": str(lic.exp_time),
+        "product_key": product_key,
+    }
+    if lic.additional_license_information:
+        additional_license_information = json.loads(
+            lic.additional_license_information)
+        additional_info = {}
+        for key in additional_license_information:
+            additional_info[key] = additional_license_information[key]
+        license_data["additional_info"] = additional_info
+
+    content = json.dumps(license_data, ensure_ascii=False,
+                         indent=4).encode("utf-8")
+    with span("file.write", path=license_path), open(license_path, "wb") as f:
+        f.write(content)
+    return etag_for(content)
+
+
+def legacy(lic, upload):
+    legacy_save_machine_digest_file(upload, "digest")
+    legacy_save_license_file(lic, "files/licenses/license.txt", "digest")
+    with open("files/licenses/license.txt", "rb") as f:
+        return f.read()
+
+
+def single_pass(lic, upload):
+    product_key = upload.read()
+    content = crud.build_license(lic, product_key.decode("utf-8"))
+    etag_for(product_key)
+    etag_for(content)
+    files = [("files/machine_digest_files/digest", product_key),
+             ("files/licenses/license.txt", content)]
+    crud.write_files(files)
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--digest-size", type=int, default=4096)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    lic = LicensesInfo(company_name="Рога и копыта", product_name="product",
+                       license_users_count=10, exp_time="2030-01-01",
+                       additional_license_information='{"seats": 10}')
+    lic.exp_time = datetime(2030, 1, 1)
+    product_key = (b"0123456789abcdef" * (args.digest_size // 16 + 1))[
+        :args.digest_size]
+    cases = {
+        "legacy": legacy,
+        "single pass": single_pass,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.makedirs("files/machine_digest_files")
+        os.makedirs("files/licenses")
+        assert legacy(lic, Upload(product_key)) \
+            == single_pass(lic, Upload(product_key))
+        for name, case in cases.items():
+            uploads = [Upload(product_key) for _ in range(args.number)]
+            best = min(timeit.repeat(
+                lambda: case(lic, uploads.pop()), number=args.number // 5,
+                repeat=5)) / (args.number // 5)
+            print(f"{name:<13}{best * 1e6:>9.1f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
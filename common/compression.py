@@ -0,0 +1,126 @@
+import gzip
+
+import anyio
+
+import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+ENCODERS = {
+    "gzip": lambda data: gzip.compress(data, compresslevel=6),
+}
+if brotli is not None:
+    ENCODERS["br"] = lambda data: brotli.compress(data, quality=4)
+if zstandard is not None:
+    ENCODERS["zstd"] = lambda data: zstandard.ZstdCompressor(
+        level=3).compress(data)
+
+PREFERENCE = [encoding for encoding in ("zstd", "br", "gzip")
+              if encoding in ENCODERS]
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in PREFERENCE:
+        if accepted.get(encoding, 0) > 0:
+            return encoding
+    return None
+
+
+async def compress(encoding: str, data: bytes) -> bytes:
+    if len(data) > config.COMPRESSION_THREAD_THRESHOLD:
+        return await anyio.to_thread.run_sync(ENCODERS[encoding], data)
+    return ENCODERS[encoding](data)
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            passthrough = True
+            headers = start_message["headers"]
+            body = message.get("body", b"")
+            if message.get("more_body", False) \
+                    or len(body) < config.COMPRESSION_MIN_SIZE \
+                    or not compressible(headers):
+                await send(start_message)
+                await send(message)
+                return
+
+            body = await compress(encoding, body)
+            headers = [(name, weak_etag(value) if name == b"etag" else value)
+                       for name, value in headers
+                       if name != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def weak_etag(etag: bytes) -> bytes:
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+def compressible(headers) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    content_type = content_type.decode("latin-1")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
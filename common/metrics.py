@@ -0,0 +1,80 @@
+import os
+import time
+
+from fastapi import Response
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+REQUESTS = Counter("http_requests_total", "HTTP requests",
+                   ["method", "route", "status"])
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency",
+                    ["method", "route", "status"])
+collectors = []
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            labels = (scope["method"],
+                      route.path if route is not None else "unmatched",
+                      str(status_code))
+            REQUESTS.labels(*labels).inc()
+            LATENCY.labels(*labels).observe(time.perf_counter() - started_at)
+
+
+class EnginePoolCollector:
+    def __init__(self, engines: dict):
+        self.engines = engines
+
+    def collect(self):
+        connections = GaugeMetricFamily("db_pool_connections",
+                                        "Database pool connections",
+                                        labels=["engine", "state"])
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            connections.add_metric([name, "size"], pool.size())
+            connections.add_metric([name, "checked_out"], pool.checkedout())
+            connections.add_metric([name, "checked_in"], pool.checkedin())
+            connections.add_metric([name, "overflow"], pool.overflow())
+        yield connections
+
+
+def register(collector):
+    collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+def register_engines(**engines):
+    register(EnginePoolCollector(engines))
+
+
+def metrics_response() -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in collectors:
+        registry.register(collector)
+    return Response(generate_latest(registry),
+                    media_type=CONTENT_TYPE_LATEST)
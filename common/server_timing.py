@@ -0,0 +1,69 @@
+import time
+from contextvars import ContextVar
+
+import config
+
+timings: ContextVar[dict | None] = ContextVar("server_timings", default=None)
+
+
+def record(name: str, duration: float):
+    entries = timings.get()
+    if entries is None:
+        return
+    metric = name.split(".", 1)[0]
+    entries[metric] = entries.get(metric, 0.0) + duration
+
+
+def merge(prefix: str, header: str | None):
+    entries = timings.get()
+    if entries is None or not header:
+        return
+    for item in header.split(","):
+        metric, *params = [part.strip() for part in item.split(";")]
+        if not metric:
+            continue
+        duration = 0.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "dur":
+                try:
+                    duration = float(value.strip('" ')) / 1000
+                except ValueError:
+                    pass
+        name = f"{prefix}.{metric}"
+        entries[name] = entries.get(name, 0.0) + duration
+
+
+def format_header(entries: dict, total: float) -> str:
+    return ", ".join(f"{name};dur={duration * 1000:.1f}"
+                     for name, duration in [*entries.items(),
+                                            ("total", total)])
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.SERVER_TIMING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        entries = {}
+        token = timings.set(entries)
+        started_at = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                value = format_header(entries,
+                                      time.perf_counter() - started_at)
+                message = {**message,
+                           "headers": [*message.get("headers", []),
+                                       (b"server-timing",
+                                        value.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timings.reset(token)
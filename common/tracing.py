@@ -0,0 +1,227 @@
+import atexit
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+import config
+from server_timing import record
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+current_span: ContextVar["Span | None"] = ContextVar("current_span",
+                                                     default=None)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str | None = None,
+                 parent_id: str | None = None, **attributes):
+        self.name = name
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "ok"
+        self.start = time.time()
+        self._started_at = time.perf_counter()
+        self.duration = 0.0
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started_at
+        exporter.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "service": config.SERVICE_NAME,
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration * 1000,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Exporter:
+    def __init__(self, buffer_size: int, file_path: str | None):
+        self.spans = deque(maxlen=buffer_size)
+        self.file_path = file_path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+        self._pid: int | None = None
+        atexit.register(self.close)
+
+    def export(self, span: Span):
+        record = span.to_dict()
+        self.spans.append(record)
+        if self.file_path:
+            self._start()
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+    def _start(self):
+        # Threads do not survive a fork, so each worker starts its own.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._writer = threading.Thread(target=self._write,
+                                            name="trace-exporter",
+                                            daemon=True)
+            self._writer.start()
+            self._pid = os.getpid()
+
+    def _write(self):
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [json.dumps(record, ensure_ascii=False, default=str)
+                     for record in records if record is not None]
+            if lines:
+                try:
+                    with open(self.file_path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                except OSError:
+                    self.dropped += len(lines)
+            if any(record is None for record in records):
+                return
+
+    def close(self, timeout: float = 1.0):
+        if self._pid != os.getpid() or not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._pid = None
+
+    def recent(self, trace_id: str | None = None) -> list[dict]:
+        spans = list(self.spans)
+        if trace_id is not None:
+            spans = [span for span in spans if span["trace_id"] == trace_id]
+        return spans
+
+
+exporter = Exporter(config.TRACE_BUFFER_SIZE, config.TRACE_FILE)
+
+
+def start_span(name: str, **attributes) -> Span:
+    parent = current_span.get()
+    if parent is None:
+        return Span(name, **attributes)
+    return Span(name, parent.trace_id, parent.span_id, **attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    if not config.TRACING_ENABLED:
+        started_at = time.perf_counter()
+        try:
+            yield None
+        finally:
+            record(name, time.perf_counter() - started_at)
+        return
+    child = start_span(name, **attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.status = type(e).__name__
+        raise
+    finally:
+        current_span.reset(token)
+        child.finish()
+        record(name, child.duration)
+
+
+def traceparent() -> str | None:
+    parent = current_span.get()
+    return parent.traceparent() if parent is not None else None
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = TRACEPARENT.match(value.decode("latin-1"))
+                if match is not None:
+                    trace_id, parent_id = match.group(1), match.group(2)
+                break
+        server_span = Span(scope["method"], trace_id, parent_id)
+        token = current_span.set(server_span)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                server_span.attributes["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            server_span.status = type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            route = scope.get("route")
+            server_span.name = f"{scope['method']} " \
+                + (route.path if route is not None else scope["path"])
+            server_span.finish()
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        context._query_started_at = time.perf_counter()
+        if config.TRACING_ENABLED and current_span.get() is not None:
+            context._trace_span = start_span("db.query",
+                                             statement=statement[:200])
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context,
+                             executemany):
+        started_at = getattr(context, "_query_started_at", None)
+        if started_at is not None:
+            record("db.query", time.perf_counter() - started_at)
+        query_span = getattr(context, "_trace_span", None)
+        if query_span is not None:
+            context._trace_span = None
+            query_span.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        query_span = getattr(context, "_trace_span", None)
+        if query_span is not None:
+            context._trace_span = None
+            error = exception_context.original_exception
+            query_span.status = type(error).__name__
+            query_span.finish()
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import aiohttp
+import jwt
+
+import config
+from upstream import pool
+
+
+class AccessCatalogue:
+    def __init__(self, url: str):
+        self.url = url
+        self.version: str | None = None
+        self.bits: dict[str, int] = {}
+        self.refreshed_at = 0.0
+
+    def load(self, catalogue: dict):
+        self.bits = {name: 1 << access_id
+                     for name, access_id in catalogue["accesses"].items()}
+        self.version = catalogue["version"]
+
+    async def refresh(self):
+        self.refreshed_at = time.monotonic()
+        try:
+            upstream = pool.get(self.url)
+            _, url = upstream.resolve(self.url)
+            headers = {"Accept-Encoding": "identity"}
+            async with upstream.session().get(url,
+                                              headers=headers) as response:
+                if response.status == 200:
+                    self.load(await response.json())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+    async def has_access(self, claims: dict, access_level: str) -> bool:
+        if "acl" not in claims:
+            return access_level in claims.get("claims", [])
+        if claims.get("acl_v") != self.version:
+            elapsed = time.monotonic() - self.refreshed_at
+            if elapsed > config.ACCESS_CATALOGUE_REFRESH_INTERVAL:
+                await self.refresh()
+            if claims.get("acl_v") != self.version:
+                raise jwt.InvalidTokenError("Unknown access catalogue version")
+        return bool(claims["acl"] & self.bits.get(access_level, 0))
+
+
+access_catalogue = AccessCatalogue(
+    f"{config.AUTH_SERVICE_URL}/accesses/catalogue")
@@ -1,126 +1,365 @@
-import os
-from functools import wraps
-from typing import Any, Optional, Union
+import asyncio
+import time
+from functools import partial, wraps
+from typing import Any, AsyncIterator, Hashable, Optional, Union
 import aiohttp
 import jwt
 from aiohttp.formdata import FormData
 from fastapi import Request, Response, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRouter
+from starlette.routing import compile_path
+import config
 import crud
+from compression import negotiate
+from download_cache import DownloadCache, etag_matches
+from access_catalogue import access_catalogue
+from forwarding import ForwardingPlan
+from resilience import BULK, is_upstream_failure
+from response_cache import CachePolicy, response_cache
+from retry import IDEMPOTENT_METHODS, RetryPolicy, discard
+from rate_limit import RateLimit, rate_limiter
+from server_timing import merge
+from single_flight import single_flight
+from token_cache import claims_scope, token_cache
+from tracing import span, traceparent
+from upstream import pool
 
 router = APIRouter()
 
+STREAM_HEADERS = ('Content-Disposition', 'Content-Length', 'Content-Encoding',
+                  'ETag', 'Last-Modified')
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+STREAM_MEDIA_TYPES = ('text/plain', 'application/octet-stream', 'text/csv',
+                      'application/x-ndjson', 'application/zip')
+
+
+class UpstreamBody:
+    def __init__(self, content: bytes, media_type: str, headers: dict):
+        self.content = content
+        self.media_type = media_type
+        self.headers = headers
+
+    def to_response(self, status_code: int) -> Response:
+        return Response(content=self.content, status_code=status_code,
+                        media_type=self.media_type or None,
+                        headers=self.headers)
+
+    def matches(self, if_none_match: str | None) -> bool:
+        etag = self.headers.get('ETag')
+        return etag is not None and etag_matches(etag, if_none_match)
+
+    def not_modified(self) -> Response:
+        headers = {name: value for name, value in self.headers.items()
+                   if name in ('ETag', 'Last-Modified')}
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+
+
+class GatewayRoute:
+    def __init__(self, method: str, path: str, access_level: str | None,
+                 passthrough: bool, streaming: bool, exchange):
+        self.method = method
+        self.path = path
+        self.access_level = access_level
+        self.passthrough = passthrough
+        self.streaming = streaming
+        self.exchange = exchange
+        self.path_regex, _, _ = compile_path(path)
+
+    def match(self, method: str, path: str) -> dict | None:
+        if method != self.method:
+            return None
+        match = self.path_regex.match(path)
+        if match is None:
+            return None
+        return match.groupdict()
+
+
+routes: list[GatewayRoute] = []
+
+
+def find_route(method: str, path: str):
+    for route in routes:
+        path_params = route.match(method, path)
+        if path_params is not None:
+            return route, path_params
+    return None, None
+
+
+async def authorize(token: str, access_level: str) -> dict:
+    try:
+        with span("jwt.decode"):
+            claims = token_cache.decode(token)
+        if not await access_catalogue.has_access(claims, access_level):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="No access")
+        return claims
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                            detail="Invalid token")
+
 
 def gateway_router(method,
                    path: str,
                    payload_key: str,
                    service_url: str,
                    access_level: str | None = None,
-                   response_model: Optional[Any] = None):
+                   response_model: Optional[Any] = None,
+                   passthrough: bool = False,
+                   cache: CachePolicy | None = None,
+                   invalidates: tuple[str, ...] = (),
+                   priority: str = BULK,
+                   retry: RetryPolicy | None = None,
+                   rate_limit: RateLimit | None = None,
+                   download: DownloadCache | None = None,
+                   timeout: aiohttp.ClientTimeout | None = None,
+                   streaming: bool = False):
     app_method = method(path, response_model=response_model)
 
     def wrapper(endpoint):
+        plan = ForwardingPlan(service_url, method.__name__, endpoint,
+                              payload_key, access_level, passthrough)
+        request_method = plan.method
+
+        async def exchange(request: Request, kwargs,
+                           claims: dict | None = None):
+            headers = {}
+            with span("crud.encode"):
+                url = plan.url(request.scope['path'], kwargs)
+                if not passthrough:
+                    data = plan.body(kwargs)
+            encoding = None
+            if download is None:
+                encoding = negotiate(request.headers.get('accept-encoding'))
+            validators = {name: request.headers[name]
+                          for name in CONDITIONAL_HEADERS
+                          if name in request.headers}
+            cache_key = None
+            if cache is not None and request_method == "get":
+                cache_key = (*cache.key(url, claims), encoding)
+                cached = response_cache.get(cache, cache_key)
+                if cached is not None:
+                    if cached.matches(validators.get('If-None-Match')):
+                        return (cached.not_modified(),
+                                status.HTTP_304_NOT_MODIFIED)
+                    return cached, status.HTTP_200_OK
+            client_etags = validators.get('If-None-Match')
+            downloaded = None
+            if download is not None and download.enabled \
+                    and request_method == "get":
+                downloaded = download.get(url)
+                if downloaded is not None:
+                    validators['If-None-Match'] = download.validators(
+                        downloaded, client_etags)
+            if passthrough:
+                data = crud.passthrough_body(request,
+                                             config.MAX_PASSTHROUGH_BODY_SIZE)
+                headers = crud.passthrough_headers(request)
+            headers["Accept-Encoding"] = encoding or "identity"
+            headers.update(validators)
+            coalesce_key = None
+            if request_method == "get" and not passthrough:
+                coalesce_key = (request_method, url, claims_scope(claims),
+                                encoding, *validators.values())
+            response_data, response_code = await send_request(
+                url=url,
+                method=request_method,
+                data=data,
+                headers=headers,
+                coalesce_key=coalesce_key,
+                priority=priority,
+                retry=retry,
+                timeout=timeout
+            )
+            with span("response.cache"):
+                if cache_key is not None and response_code == 200 \
+                        and isinstance(response_data, UpstreamBody):
+                    response_cache.set(cache, cache_key, response_data)
+                if invalidates and 200 <= response_code < 300:
+                    response_cache.invalidate(*invalidates)
+                if downloaded is not None \
+                        and response_code == status.HTTP_304_NOT_MODIFIED \
+                        and response_data.headers.get('ETag') \
+                        == downloaded.etag \
+                        and not etag_matches(downloaded.etag, client_etags):
+                    return download.serve(downloaded), status.HTTP_200_OK
+                if download is not None and download.enabled \
+                        and response_code == status.HTTP_200_OK \
+                        and isinstance(response_data, StreamingResponse):
+                    download.store(url, response_data)
+            return response_data, response_code
+
+        async def forward(request: Request, response: Response, kwargs,
+                          claims: dict | None = None):
+            response_data, response_code = await exchange(request, kwargs,
+                                                          claims)
+            if isinstance(response_data, UpstreamBody):
+                return response_data.to_response(response_code)
+            response.status_code = response_code
+            return response_data
+
         @app_method
         @wraps(endpoint)
         async def decorator(request: Request, response: Response, **kwargs):
-            if access_level is None:
-                scope = request.scope
-                headers = {}
-                request_method = scope['method'].lower()
-                path = scope['path']
-                payload = kwargs.get(payload_key)
-                data = crud.form_data(kwargs, payload, payload_key)
-                url = crud.form_url(service_url, path, kwargs)
-                response_data, response_code = await send_request(
-                    url=url,
-                    method=request_method,
-                    data=data,
-                    headers=headers
-                )
-                response.status_code = response_code
-                return response_data
-            else:
-                try:
-                    decoded_token = jwt.decode(kwargs.get('token'),
-                                               os.getenv("SECRET_KEY"),
-                                               algorithms=['HS256'],
-                                               options={'verify_aud': True}
-                                               )
-                    has_access = decoded_token["claims"]
-                    if access_level in has_access:
-                        scope = request.scope
-                        headers = {}
-                        request_method = scope['method'].lower()
-                        path = scope['path']
-                        payload = kwargs.get(payload_key)
-                        data = crud.form_data(kwargs, payload, payload_key)
-                        url = crud.form_url(service_url, path, kwargs)
-                        response_data, response_code = await send_request(
-                            url=url,
-                            method=request_method,
-                            data=data,
-                            headers=headers
-                        )
-                        response.status_code = response_code
-                        return response_data
-                    else:
-                        raise HTTPException(
-                            status_code=status.HTTP_403_FORBIDDEN,
-                            detail="No access")
-                except (jwt.InvalidSignatureError, jwt.DecodeError):
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid token")
+            claims = None
+            if access_level is not None:
+                claims = await authorize(kwargs.get('token'), access_level)
+            if rate_limit is not None:
+                await rate_limiter.check(rate_limit, request, claims)
+            return await forward(request, response, kwargs, claims)
+
+        routes.append(GatewayRoute(request_method.upper(), path,
+                                   access_level, passthrough,
+                                   streaming or download is not None,
+                                   exchange))
 
     return wrapper
 
 
-async def send_request(url: str, method: str, data: Union[dict, FormData],
-                       headers: dict = None):
+class UpstreamStream(StreamingResponse):
+    def __init__(self, upstream, on_close, **kwargs):
+        self.upstream = upstream
+        self.on_close = on_close
+        super().__init__(stream_response(self), **kwargs)
+
+    def close(self):
+        if self.upstream is None:
+            return
+        upstream, self.upstream = self.upstream, None
+        upstream.release()
+        self.on_close()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.close()
+
+
+async def stream_response(stream: UpstreamStream):
+    try:
+        async for chunk in stream.upstream.content.iter_chunked(
+                config.STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        stream.close()
+
+
+def forwarded_headers(response) -> dict:
+    headers = {}
+    for name in STREAM_HEADERS:
+        value = response.headers.get(name)
+        if value is not None:
+            headers[name] = value
+    return headers
+
+
+async def send_request(url: str, method: str,
+                       data: Union[dict, FormData, AsyncIterator[bytes]],
+                       headers: dict = None,
+                       coalesce_key: Hashable | None = None,
+                       priority: str = BULK,
+                       retry: RetryPolicy | None = None,
+                       timeout: aiohttp.ClientTimeout | None = None):
     if headers is None:
         headers = {}
+    call = partial(request_upstream, url, method, data, headers, priority,
+                   timeout)
+    if retry is not None and method in IDEMPOTENT_METHODS:
+        call = partial(retry.call, call)
+    if coalesce_key is None:
+        return await call()
+
+    result, shared = await single_flight.do(coalesce_key, call, discard)
+    if shared and isinstance(result[0], Response):
+        return await call()
+    return result
+
+
+async def request_upstream(url: str, method: str,
+                           data: Union[dict, FormData, AsyncIterator[bytes]],
+                           headers: dict,
+                           priority: str = BULK,
+                           timeout: aiohttp.ClientTimeout | None = None):
+    upstream = pool.get(url)
+    await upstream.bulkhead.acquire(priority)
+    release = upstream.bulkhead.release
+    upstream.requests_total += 1
+    upstream.in_flight += 1
+    replica, replica_url = upstream.resolve(url)
+    replica.outstanding += 1
+    replica.requests_total += 1
+    started_at = time.monotonic()
+    probe = False
+    response = None
     try:
-        async with aiohttp.ClientSession() as session:
-            request = getattr(session, method)
-            if isinstance(data, dict):
-                async with request(url=url, json=data,
-                                   headers=headers) as response:
-                    content_type = response.headers.get('Content-Type', '')
-                    response_code = response.status
-                    if 'application/json' in content_type:
-                        data = await response.json()
-                    elif 'text/plain' in content_type or 'application/octet-stream' in content_type:
-                        file_name = \
-                            response.headers.get('Content-Disposition').split(
-                                "filename=")[1].strip('"')
-                        file_content = await response.read()
-                        temp_file_path = f'/tmp/{file_name}'
-                        with open(temp_file_path, 'wb') as f:
-                            f.write(file_content)
-                        return FileResponse(path=temp_file_path,
-                                            filename=file_name), response_code
-                    else:
-                        data = await response.read()
-            else:
-                async with request(url=url, data=data,
-                                   headers=headers) as response:
-                    content_type = response.headers.get('Content-Type', '')
-                    response_code = response.status
-                    if 'application/json' in content_type:
-                        data = await response.json()
-                    elif 'text/plain' in content_type or 'application/octet-stream' in content_type:
-                        file_name = \
-                            response.headers.get('Content-Disposition').split(
-                                "filename=")[1].strip('"')
-                        file_content = await response.read()
-                        temp_file_path = f'/tmp/{file_name}'
-                        with open(temp_file_path, 'wb') as f:
-                            f.write(file_content)
-                        return FileResponse(path=temp_file_path,
-                                            filename=file_name), response_code
-                    else:
-                        data = await response.read()
-            return data, response_code
+        probe = upstream.breaker.allow()
+        request = getattr(upstream.session(), method)
+        if isinstance(data, dict):
+            body = {"json": data}
+        else:
+            body = {"data": data}
+        if timeout is not None:
+            body["timeout"] = timeout
+        with span("upstream.request", upstream=upstream.name, method=method,
+                  url=replica_url):
+            parent = traceparent()
+            if parent is not None:
+                headers = {**headers, "traceparent": parent}
+            response = await request(url=replica_url, headers=headers,
+                                     **body)
+        content_type = response.headers.get('Content-Type', '')
+        response_code = response.status
+        merge(upstream.name, response.headers.get('Server-Timing'))
+        upstream.record(replica, method, started_at, response_code)
+        if is_upstream_failure(response_code):
+            upstream.breaker.record_failure()
+        else:
+            upstream.breaker.record_success()
+        probe = False
+        if any(media_type in content_type
+               for media_type in STREAM_MEDIA_TYPES):
+            streaming_response = UpstreamStream(
+                response, release,
+                status_code=response_code,
+                headers=forwarded_headers(response),
+                media_type=content_type,
+            )
+            response = None
+            release = None
+            return streaming_response, response_code
+        headers = forwarded_headers(response)
+        headers.pop('Content-Length', None)
+        with span("response.read"):
+            data = UpstreamBody(await response.read(), content_type, headers)
+        return data, response_code
+    except HTTPException:
+        upstream.errors_total += 1
+        raise
+    except asyncio.TimeoutError:
+        upstream.errors_total += 1
+        upstream.record(replica, method, started_at, None)
+        upstream.breaker.record_failure()
+        probe = False
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                            detail="Upstream timeout")
+    except aiohttp.ClientError as e:
+        upstream.errors_total += 1
+        upstream.record(replica, method, started_at, None)
+        upstream.breaker.record_failure()
+        probe = False
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY,
+                            detail=str(e))
     except Exception as e:
+        upstream.errors_total += 1
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        replica.outstanding -= 1
+        if probe:
+            upstream.breaker.record_abort()
+        if response is not None:
+            response.release()
+        if release is not None:
+            release()
+        upstream.in_flight -= 1
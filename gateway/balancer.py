@@ -0,0 +1,68 @@
+import itertools
+import random
+
+
+class Replica:
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.healthy = True
+        self.outstanding = 0
+        self.ewma_latency = 0.0
+        self.failures = 0
+        self.successes = 0
+        self.requests_total = 0
+
+    def observe(self, latency: float, decay: float):
+        if self.ewma_latency == 0.0:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = decay * self.ewma_latency \
+                + (1 - decay) * latency
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewma_latency": self.ewma_latency,
+            "requests_total": self.requests_total,
+        }
+
+
+class RoundRobin:
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def pick(self, replicas: list[Replica]) -> Replica:
+        return replicas[next(self._counter) % len(replicas)]
+
+
+class LeastOutstanding:
+    def pick(self, replicas: list[Replica]) -> Replica:
+        fewest = min(replica.outstanding for replica in replicas)
+        return random.choice([replica for replica in replicas
+                              if replica.outstanding == fewest])
+
+
+class EwmaLatency:
+    def pick(self, replicas: list[Replica]) -> Replica:
+        first, second = random.sample(replicas, 2) \
+            if len(replicas) > 1 else (replicas[0], replicas[0])
+        return min(first, second, key=self.cost)
+
+    @staticmethod
+    def cost(replica: Replica) -> float:
+        return replica.ewma_latency * (replica.outstanding + 1)
+
+
+BALANCERS = {
+    "round_robin": RoundRobin,
+    "least_outstanding": LeastOutstanding,
+    "ewma": EwmaLatency,
+}
+
+
+def create_balancer(name: str):
+    try:
+        return BALANCERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown upstream balancer: {name}")
@@ -0,0 +1,109 @@
+import asyncio
+import urllib.parse
+
+import jwt
+import orjson
+from fastapi import HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+
+import config
+from access_catalogue import access_catalogue
+from api_wrapper import UpstreamBody, find_route
+from dto.batch import BatchItem
+from retry import discard
+from token_cache import token_cache
+from tracing import span
+
+BATCH_METHODS = ("GET",)
+DROPPED_HEADERS = (b"accept-encoding", b"content-length", b"content-type",
+                   b"if-none-match", b"if-modified-since")
+
+
+def sub_request(request: Request, method: str, path: str,
+                query_string: str) -> Request:
+    headers = [(name, value) for name, value in request.scope["headers"]
+               if name not in DROPPED_HEADERS]
+    headers.append((b"accept-encoding", b"identity"))
+    return Request({
+        **request.scope,
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "headers": headers,
+    })
+
+
+def batch_body(response_data):
+    if not isinstance(response_data, UpstreamBody):
+        discard((response_data, None))
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                            detail="Response cannot be batched")
+    if not response_data.content:
+        return None
+    if "json" in (response_data.media_type or ""):
+        return orjson.Fragment(response_data.content)
+    return response_data.content.decode(errors="replace")
+
+
+async def run_item(request: Request, token: str, claims: dict,
+                   access: dict, item: BatchItem) -> dict:
+    method = item.method.upper()
+    path, _, query_string = item.path.partition("?")
+    result = {"id": item.id}
+    with span("batch.request", method=method, path=path):
+        try:
+            if method not in BATCH_METHODS:
+                raise HTTPException(
+                    status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+                    detail="Method not allowed in batch")
+            route, path_params = find_route(method, path)
+            if route is None or route.passthrough:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                    detail="Not Found")
+            if route.streaming:
+                raise HTTPException(
+                    status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                    detail="Response cannot be batched")
+            if route.access_level is not None:
+                if route.access_level not in access:
+                    access[route.access_level] = asyncio.ensure_future(
+                        access_catalogue.has_access(claims,
+                                                    route.access_level))
+                if not await access[route.access_level]:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="No access")
+            kwargs = {**path_params,
+                      **dict(urllib.parse.parse_qsl(query_string)),
+                      "token": token}
+            response_data, response_code = await route.exchange(
+                sub_request(request, method, path, query_string),
+                kwargs, claims)
+            result["status"] = response_code
+            result["body"] = batch_body(response_data)
+        except jwt.InvalidTokenError:
+            result["status"] = status.HTTP_401_UNAUTHORIZED
+            result["body"] = {"detail": "Invalid token"}
+        except HTTPException as e:
+            result["status"] = e.status_code
+            result["body"] = {"detail": e.detail}
+    return result
+
+
+async def execute_batch(request: Request, token: str,
+                        items: list[BatchItem]) -> ORJSONResponse:
+    if len(items) > config.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch is limited to {config.BATCH_MAX_REQUESTS} requests")
+    try:
+        with span("jwt.decode"):
+            claims = token_cache.decode(token)
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                            detail="Invalid token")
+    access = {}
+    responses = await asyncio.gather(
+        *(run_item(request, token, claims, access, item) for item in items))
+    return ORJSONResponse({"responses": responses})
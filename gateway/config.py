@@ -0,0 +1,106 @@
+import os
+import tempfile
+
+AUTH_SERVICE_URL = os.environ.get("AUTH_SERVICE_URL")
+LICENSE_SERVICE_URL = os.environ.get("LICENSE_SERVICE_URL")
+
+SECRET_KEY = os.environ.get("SECRET_KEY")
+
+UPSTREAM_LIMIT = int(os.environ.get("UPSTREAM_LIMIT", 100))
+UPSTREAM_LIMIT_PER_HOST = int(os.environ.get("UPSTREAM_LIMIT_PER_HOST", 50))
+UPSTREAM_KEEPALIVE_TIMEOUT = float(
+    os.environ.get("UPSTREAM_KEEPALIVE_TIMEOUT", 30))
+UPSTREAM_DNS_CACHE_TTL = int(os.environ.get("UPSTREAM_DNS_CACHE_TTL", 300))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 5))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", 30))
+UPSTREAM_TOTAL_TIMEOUT = float(os.environ.get("UPSTREAM_TOTAL_TIMEOUT", 60))
+
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 64 * 1024))
+EXPORT_TOTAL_TIMEOUT = float(os.environ.get("EXPORT_TOTAL_TIMEOUT", 0)) or None
+
+MAX_PASSTHROUGH_BODY_SIZE = int(
+    os.environ.get("MAX_PASSTHROUGH_BODY_SIZE", 10 * 1024 * 1024))
+
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get("TOKEN_CACHE_MAX_SIZE", 1024))
+TOKEN_CACHE_MAX_TTL = float(os.environ.get("TOKEN_CACHE_MAX_TTL", 3 * 60 * 60))
+
+ACCESS_CATALOGUE_REFRESH_INTERVAL = float(
+    os.environ.get("ACCESS_CATALOGUE_REFRESH_INTERVAL", 30))
+
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 30))
+RESPONSE_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 128))
+
+UPSTREAM_MAX_IN_FLIGHT = int(os.environ.get("UPSTREAM_MAX_IN_FLIGHT", 50))
+UPSTREAM_MAX_QUEUE = int(os.environ.get("UPSTREAM_MAX_QUEUE", 100))
+UPSTREAM_QUEUE_TIMEOUT = float(os.environ.get("UPSTREAM_QUEUE_TIMEOUT", 5))
+UPSTREAM_RESERVED_SLOTS = int(os.environ.get("UPSTREAM_RESERVED_SLOTS", 5))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("CIRCUIT_RESET_TIMEOUT", 10))
+
+UPSTREAM_BALANCER = os.environ.get("UPSTREAM_BALANCER", "round_robin")
+UPSTREAM_EWMA_DECAY = float(os.environ.get("UPSTREAM_EWMA_DECAY", 0.8))
+HEALTH_CHECK_PATH = os.environ.get("HEALTH_CHECK_PATH", "/health")
+HEALTH_CHECK_INTERVAL = float(os.environ.get("HEALTH_CHECK_INTERVAL", 5))
+HEALTH_CHECK_TIMEOUT = float(os.environ.get("HEALTH_CHECK_TIMEOUT", 2))
+HEALTH_CHECK_FALL = int(os.environ.get("HEALTH_CHECK_FALL", 3))
+HEALTH_CHECK_RISE = int(os.environ.get("HEALTH_CHECK_RISE", 2))
+
+SERVICE_NAME = os.environ.get("SERVICE_NAME", "gateway")
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 2048))
+TRACE_FILE = os.environ.get("TRACE_FILE")
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED",
+                                       "true").lower() == "true"
+DIAGNOSTICS_ENABLED = os.environ.get("DIAGNOSTICS_ENABLED",
+                                     "false").lower() == "true"
+
+RETRY_BUDGET_RATIO = float(os.environ.get("RETRY_BUDGET_RATIO", 0.1))
+RETRY_BUDGET_MAX_TOKENS = float(os.environ.get("RETRY_BUDGET_MAX_TOKENS", 10))
+HEDGE_LATENCY_WINDOW = int(os.environ.get("HEDGE_LATENCY_WINDOW", 200))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", 20))
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", 2))
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_THREAD_THRESHOLD = int(
+    os.environ.get("COMPRESSION_THREAD_THRESHOLD", 256 * 1024))
+
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", 20))
+
+DOWNLOAD_CACHE_DIR = os.environ.get(
+    "DOWNLOAD_CACHE_DIR", os.path.join(tempfile.gettempdir(),
+                                       "gateway-downloads"))
+DOWNLOAD_CACHE_MAX_BYTES = int(
+    os.environ.get("DOWNLOAD_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL",
+                                      "redis://localhost:6379/0")
+RATE_LIMIT_REDIS_TIMEOUT = float(
+    os.environ.get("RATE_LIMIT_REDIS_TIMEOUT", 0.05))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 10000))
+RATE_LIMIT_FORWARDED_FOR = os.environ.get(
+    "RATE_LIMIT_FORWARDED_FOR", "true").lower() == "true"
+TOKEN_RATE_LIMIT = float(os.environ.get("TOKEN_RATE_LIMIT", 1))
+TOKEN_RATE_BURST = int(os.environ.get("TOKEN_RATE_BURST", 10))
+GENERATE_LICENSE_RATE_LIMIT = float(
+    os.environ.get("GENERATE_LICENSE_RATE_LIMIT", 2))
+GENERATE_LICENSE_RATE_BURST = int(
+    os.environ.get("GENERATE_LICENSE_RATE_BURST", 20))
+GENERATE_LICENSES_BULK_RATE_LIMIT = float(
+    os.environ.get("GENERATE_LICENSES_BULK_RATE_LIMIT", 0.1))
+GENERATE_LICENSES_BULK_RATE_BURST = int(
+    os.environ.get("GENERATE_LICENSES_BULK_RATE_BURST", 2))
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 1)) or \
+    len(os.sched_getaffinity(0))
+SERVER_LOOP = os.environ.get("SERVER_LOOP", "uvloop")
+SERVER_HTTP = os.environ.get("SERVER_HTTP", "httptools")
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 10000))
+SERVER_MAX_REQUESTS_JITTER = int(
+    os.environ.get("SERVER_MAX_REQUESTS_JITTER", 1000))
+SERVER_RELOAD = os.environ.get("SERVER_RELOAD", "false").lower() == "true"
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+import config
+
+
+class Entry:
+    def __init__(self, etag: str, path: str, size: int, media_type: str,
+                 headers: dict):
+        self.etag = etag
+        self.path = path
+        self.size = size
+        self.media_type = media_type
+        self.headers = headers
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix('W/')
+            for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+class DownloadCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.root = directory
+        self.directory = os.path.join(directory, str(os.getpid()))
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, Entry] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def open(self):
+        if not self.enabled:
+            return
+        self.directory = os.path.join(self.root, str(os.getpid()))
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+
+    def close(self):
+        self._entries.clear()
+        self.size = 0
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get(self, url: str) -> Entry | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        if not os.path.exists(entry.path):
+            self._remove(url)
+            return None
+        self._entries.move_to_end(url)
+        return entry
+
+    def validators(self, entry: Entry, if_none_match: str | None) -> str:
+        if if_none_match is None:
+            return entry.etag
+        if etag_matches(entry.etag, if_none_match):
+            return if_none_match
+        return f"{if_none_match}, {entry.etag}"
+
+    def serve(self, entry: Entry) -> FileResponse:
+        self.hits += 1
+        return FileResponse(entry.path, headers=entry.headers,
+                            media_type=entry.media_type)
+
+    def store(self, url: str, response: StreamingResponse):
+        etag = response.headers.get('etag')
+        content_length = response.headers.get('content-length')
+        if etag is None or etag.startswith('W/'):
+            return
+        if content_length is not None \
+                and int(content_length) > self.max_bytes:
+            return
+        self.misses += 1
+        headers = {name: value for name, value in response.headers.items()
+                   if name in ('content-disposition', 'etag',
+                               'last-modified')}
+        response.body_iterator = self._tee(url, etag, response.media_type,
+                                           headers, response.body_iterator)
+
+    async def _tee(self, url: str, etag: str, media_type: str, headers: dict,
+                   chunks: AsyncIterator[bytes]):
+        fd, temp_path = await run_in_threadpool(
+            tempfile.mkstemp, dir=self.directory, suffix='.part')
+        size = 0
+        committed = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                async for chunk in chunks:
+                    await run_in_threadpool(f.write, chunk)
+                    size += len(chunk)
+                    yield chunk
+            if size <= self.max_bytes:
+                await self._commit(url, Entry(etag, temp_path, size,
+                                              media_type, headers))
+                committed = True
+        finally:
+            if not committed:
+                remove_files([temp_path])
+
+    async def _commit(self, url: str, entry: Entry):
+        name = hashlib.sha256(f"{url}\n{entry.etag}".encode()).hexdigest()
+        path = os.path.join(self.directory, name)
+        await run_in_threadpool(os.replace, entry.path, path)
+        entry.path = path
+        stale = []
+        if url in self._entries:
+            previous = self._remove(url)
+            if previous.path != path:
+                stale.append(previous.path)
+        self._entries[url] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            stale.append(self._remove(next(iter(self._entries))).path)
+            self.evictions += 1
+        if stale:
+            await run_in_threadpool(remove_files, stale)
+
+    def _remove(self, url: str) -> Entry:
+        entry = self._entries.pop(url)
+        self.size -= entry.size
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def remove_files(paths: list[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+download_cache = DownloadCache(config.DOWNLOAD_CACHE_DIR,
+                               config.DOWNLOAD_CACHE_MAX_BYTES)
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
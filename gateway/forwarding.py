@@ -0,0 +1,75 @@
+import inspect
+import urllib.parse
+
+from aiohttp.formdata import FormData
+from fastapi import HTTPException, status
+
+ROUTE_PARAMS = ("token", "request", "response")
+
+
+def encode_form(payload) -> FormData:
+    data = FormData()
+    data.add_field("username", payload.username)
+    data.add_field("password", payload.password)
+    return data
+
+
+def encode_id(payload) -> dict:
+    return {"id": payload}
+
+
+def encode_model(payload) -> dict:
+    return payload.__dict__ if payload else {}
+
+
+def encode_nothing(payload) -> dict:
+    return {}
+
+
+def body_encoder(payload_key: str | None):
+    if payload_key == "form_data":
+        return encode_form
+    if payload_key == "id":
+        return encode_id
+    if payload_key:
+        return encode_model
+    return encode_nothing
+
+
+def query_names(endpoint, payload_key: str | None) -> tuple[str, ...]:
+    body_key = payload_key if payload_key != "id" else None
+    return tuple(name for name in inspect.signature(endpoint).parameters
+                 if name not in ROUTE_PARAMS and name != body_key)
+
+
+class ForwardingPlan:
+    def __init__(self, service_url: str, method: str, endpoint,
+                 payload_key: str | None, access_level: str | None,
+                 passthrough: bool):
+        self.service_url = service_url
+        self.method = method
+        self.payload_key = payload_key
+        self.access_level = access_level
+        self.passthrough = passthrough
+        self.encode_body = body_encoder(payload_key)
+        self.query_names = query_names(endpoint, payload_key)
+        self.query_keys = [(name, urllib.parse.quote_plus(name) + "=")
+                           for name in self.query_names]
+
+    def url(self, path: str, kwargs: dict) -> str:
+        if not self.query_keys:
+            return self.service_url + path
+        query_string = "&".join(
+            key + urllib.parse.quote_plus(str(value))
+            for name, key in self.query_keys
+            if (value := kwargs.get(name)) is not None)
+        if not query_string:
+            return self.service_url + path
+        return f"{self.service_url}{path}?{query_string}"
+
+    def body(self, kwargs: dict):
+        try:
+            return self.encode_body(kwargs.get(self.payload_key))
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=str(e))
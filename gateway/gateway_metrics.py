@@ -0,0 +1,57 @@
+from prometheus_client import Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from metrics import register
+
+UPSTREAM_LATENCY = Histogram("gateway_upstream_duration_seconds",
+                             "Upstream call latency",
+                             ["upstream", "method", "status"])
+
+
+class GatewayCollector:
+    def __init__(self, pool, caches: dict, single_flight, retry_budget):
+        self.pool = pool
+        self.caches = caches
+        self.single_flight = single_flight
+        self.retry_budget = retry_budget
+
+    def collect(self):
+        hits = CounterMetricFamily("gateway_cache_hits", "Cache hits",
+                                   labels=["cache"])
+        misses = CounterMetricFamily("gateway_cache_misses", "Cache misses",
+                                     labels=["cache"])
+        for name, cache in self.caches.items():
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+        yield hits
+        yield misses
+
+        coalesced = CounterMetricFamily("gateway_coalesced_requests",
+                                        "Requests served by another "
+                                        "in-flight upstream call")
+        coalesced.add_metric([], self.single_flight.followers)
+        yield coalesced
+
+        retries = CounterMetricFamily("gateway_upstream_retries",
+                                      "Upstream retries and hedges",
+                                      labels=["kind"])
+        retries.add_metric(["retry"], self.retry_budget.retries)
+        retries.add_metric(["hedge"], self.retry_budget.hedges)
+        retries.add_metric(["budget_exhausted"], self.retry_budget.exhausted)
+        yield retries
+
+        in_flight = GaugeMetricFamily("gateway_upstream_in_flight",
+                                      "Upstream requests in flight",
+                                      labels=["upstream"])
+        queued = GaugeMetricFamily("gateway_upstream_queued",
+                                   "Upstream requests waiting in the bulkhead",
+                                   labels=["upstream"])
+        for name, upstream in self.pool.upstreams.items():
+            in_flight.add_metric([name], upstream.bulkhead.in_flight)
+            queued.add_metric([name], upstream.bulkhead.queued)
+        yield in_flight
+        yield queued
+
+
+def register_gateway(pool, caches: dict, single_flight, retry_budget):
+    register(GatewayCollector(pool, caches, single_flight, retry_budget))
@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+
+from uvicorn.workers import UvicornWorker
+
+import config as settings
+
+wsgi_app = "main:app"
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+workers = 1 if settings.SERVER_RELOAD else settings.SERVER_WORKERS
+reload = settings.SERVER_RELOAD
+keepalive = settings.SERVER_KEEPALIVE
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+accesslog = "-"
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": settings.SERVER_LOOP, "http": settings.SERVER_HTTP}
+
+
+worker_class = Worker
+
+if workers > 1:
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR",
+        os.path.join(tempfile.gettempdir(),
+                     f"{settings.SERVICE_NAME}-metrics"))
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def on_starting(server):
+    if workers == 1:
+        return
+    server.log.warning("Response cache invalidation only reaches the worker "
+                       "that handled the write")
+    if settings.RATE_LIMIT_BACKEND != "redis":
+        server.log.warning("Memory rate limits apply per worker, %d workers "
+                           "allow %dx the configured rate", workers, workers)
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
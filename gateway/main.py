@@ -1,17 +1,79 @@
 import os
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import Depends, FastAPI, File, UploadFile, Request, Response
+import aiohttp
+from fastapi import APIRouter, Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
+import config
+from access_catalogue import access_catalogue
 from api_wrapper import gateway_router
-from dto.license import LicensesInfo, SoftwareCreate, SoftwareUpdate
+from batch import execute_batch
+from compression import CompressionMiddleware
+from download_cache import download_cache
+from gateway_metrics import register_gateway
+from metrics import MetricsMiddleware, metrics_response
+from rate_limit import IP, SUBJECT, RateLimit, rate_limiter
+from resilience import CRITICAL
+from response_cache import CachePolicy, response_cache
+from retry import RetryPolicy, retry_budget
+from server_timing import ServerTimingMiddleware
+from single_flight import single_flight
+from token_cache import token_cache
+from tracing import TracingMiddleware, exporter
+from upstream import pool
+from dto.batch import BatchRequest
+from dto.license import SoftwareCreate, SoftwareUpdate
 from dto.user import UserCreate, RoleCreate, Access_to_Role, Role_to_User
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+diagnostics = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
+users_cache = CachePolicy("users", config.RESPONSE_CACHE_TTL,
+                          config.RESPONSE_CACHE_MAX_ENTRIES)
+roles_cache = CachePolicy("roles", config.RESPONSE_CACHE_TTL,
+                          config.RESPONSE_CACHE_MAX_ENTRIES)
+accesses_cache = CachePolicy("accesses", config.RESPONSE_CACHE_TTL,
+                             config.RESPONSE_CACHE_MAX_ENTRIES)
+software_cache = CachePolicy("software", config.RESPONSE_CACHE_TTL,
+                             config.RESPONSE_CACHE_MAX_ENTRIES)
+
+users_me_retry = RetryPolicy(config.RETRY_MAX_ATTEMPTS, hedge=True)
+license_retry = RetryPolicy(config.RETRY_MAX_ATTEMPTS, hedge=True)
+software_retry = RetryPolicy(config.RETRY_MAX_ATTEMPTS, hedge=True)
+
+streaming_timeout = aiohttp.ClientTimeout(
+    total=config.EXPORT_TOTAL_TIMEOUT,
+    connect=config.UPSTREAM_CONNECT_TIMEOUT,
+    sock_read=config.UPSTREAM_READ_TIMEOUT,
+)
+
+token_rate_limit = RateLimit("token", config.TOKEN_RATE_LIMIT,
+                             config.TOKEN_RATE_BURST, key=IP)
+generate_license_rate_limit = RateLimit("generate_license",
+                                        config.GENERATE_LICENSE_RATE_LIMIT,
+                                        config.GENERATE_LICENSE_RATE_BURST,
+                                        key=SUBJECT)
+generate_licenses_bulk_rate_limit = RateLimit(
+    "generate_licenses_bulk",
+    config.GENERATE_LICENSES_BULK_RATE_LIMIT,
+    config.GENERATE_LICENSES_BULK_RATE_BURST,
+    key=SUBJECT)
+
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+register_gateway(pool,
+                 {"token": token_cache, "response": response_cache,
+                  "download": download_cache},
+                 single_flight,
+                 retry_budget)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,12 +84,86 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    download_cache.open()
+    await pool.start()
+    await access_catalogue.refresh()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await pool.close()
+    await rate_limiter.close()
+    download_cache.close()
+
+
+@diagnostics.get("/metrics")
+async def read_metrics():
+    return metrics_response()
+
+
+@diagnostics.get("/debug/traces")
+async def read_traces(trace_id: str | None = None):
+    return exporter.recent(trace_id)
+
+
+@diagnostics.get("/upstream_stats")
+async def upstream_stats():
+    return pool.stats()
+
+
+@diagnostics.get("/token_cache_stats")
+async def token_cache_stats():
+    return token_cache.stats()
+
+
+@diagnostics.get("/response_cache_stats")
+async def response_cache_stats():
+    return response_cache.stats()
+
+
+@diagnostics.get("/download_cache_stats")
+async def download_cache_stats():
+    return download_cache.stats()
+
+
+@diagnostics.get("/retry_stats")
+async def retry_stats():
+    return retry_budget.stats()
+
+
+@diagnostics.get("/rate_limit_stats")
+async def rate_limit_stats():
+    return rate_limiter.stats()
+
+
+@diagnostics.get("/single_flight_stats")
+async def single_flight_stats():
+    return single_flight.stats()
+
+
+if config.DIAGNOSTICS_ENABLED:
+    app.include_router(diagnostics)
+
+
+@app.post("/batch")
+async def batch(
+    batch: BatchRequest,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    request: Request,
+):
+    return await execute_batch(request, token, batch.requests)
+
+
 @gateway_router(
     app.post,
     "/token",
     payload_key="form_data",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level=None,
+    priority=CRITICAL,
+    rate_limit=token_rate_limit,
 )
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
@@ -43,6 +179,8 @@ async def login(
     payload_key=None,
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level=None,
+    priority=CRITICAL,
+    retry=users_me_retry,
 )
 async def read_users_me(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -55,16 +193,35 @@ async def read_users_me(
 @gateway_router(
     app.post,
     "/generate_license",
-    payload_key="generate_license",
+    payload_key=None,
     service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="CREATE_LICENSE",
+    passthrough=True,
+    rate_limit=generate_license_rate_limit,
 )
 async def generate_license(
     token: Annotated[str, Depends(oauth2_scheme)],
     request: Request,
     response: Response,
-    lic: LicensesInfo = Depends(LicensesInfo.as_form),
-    machine_digest_file: UploadFile = File(...),
+):
+    pass
+
+
+@gateway_router(
+    app.post,
+    "/generate_licenses/bulk",
+    payload_key=None,
+    service_url=os.environ.get("LICENSE_SERVICE_URL"),
+    access_level="CREATE_LICENSE",
+    passthrough=True,
+    rate_limit=generate_licenses_bulk_rate_limit,
+    timeout=streaming_timeout,
+    streaming=True,
+)
+async def generate_licenses_bulk(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    request: Request,
+    response: Response,
 ):
     pass
 
@@ -80,6 +237,36 @@ async def get_all_licenses(
     token: Annotated[str, Depends(oauth2_scheme)],
     request: Request,
     response: Response,
+    company_name: str | None = None,
+    product_name: str | None = None,
+    exp_time_from: datetime | None = None,
+    exp_time_to: datetime | None = None,
+    sort: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+    with_total: bool | None = None,
+):
+    pass
+
+
+@gateway_router(
+    app.get,
+    "/licenses/export",
+    payload_key=None,
+    service_url=os.environ.get("LICENSE_SERVICE_URL"),
+    access_level="READ_LICENSE",
+    timeout=streaming_timeout,
+    streaming=True,
+)
+async def export_licenses(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    request: Request,
+    response: Response,
+    format: str | None = None,
+    company_name: str | None = None,
+    product_name: str | None = None,
+    exp_time_from: datetime | None = None,
+    exp_time_to: datetime | None = None,
 ):
     pass
 
@@ -90,6 +277,8 @@ async def get_all_licenses(
     payload_key=None,
     service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="RETRIEVE_FILE",
+    retry=license_retry,
+    download=download_cache,
 )
 async def find_license(
     id: int,
@@ -106,6 +295,7 @@ async def find_license(
     payload_key=None,
     service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="RETRIEVE_FILE",
+    download=download_cache,
 )
 def find_machine_digest(
     id: int,
@@ -136,6 +326,7 @@ def read_public_key(
     payload_key=None,
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    cache=users_cache,
 )
 def read_users(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -151,6 +342,7 @@ def read_users(
     payload_key="user",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("users",),
 )
 def create_user(
     user: UserCreate,
@@ -167,6 +359,7 @@ def create_user(
     payload_key="id",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("users",),
 )
 def delete_user(
     id: int,
@@ -183,6 +376,7 @@ def delete_user(
     payload_key='',
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    cache=roles_cache,
 )
 def read_roles(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -198,6 +392,7 @@ def read_roles(
     payload_key="role",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("roles",),
 )
 def create_role(
     role: RoleCreate,
@@ -214,6 +409,7 @@ def create_role(
     payload_key="id",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("roles",),
 )
 def delete_role(
     id: int,
@@ -230,6 +426,7 @@ def delete_role(
     payload_key="role_to_user",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("users",),
 )
 async def change_user_role(
     role_to_user: Role_to_User,
@@ -246,6 +443,7 @@ async def change_user_role(
     payload_key=None,
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    cache=accesses_cache,
 )
 def read_accesses(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -261,6 +459,7 @@ def read_accesses(
     payload_key="access_to_role",
     service_url=os.environ.get("AUTH_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("roles",),
 )
 async def change_role_accesses(
     access_to_role: Access_to_Role,
@@ -278,6 +477,8 @@ async def change_role_accesses(
     payload_key='',
     service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="READ_LICENSE",
+    cache=software_cache,
+    retry=software_retry,
 )
 async def get_software(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -293,6 +494,7 @@ async def get_software(
     payload_key="software",
     service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="CREATE_LICENSE",
+    invalidates=("software",),
 )
 async def create_software(
     token: Annotated[str, Depends(oauth2_scheme)],
@@ -310,6 +512,7 @@ async def create_software(
     payload_key='',
     service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="RETRIEVE_FILE",
+    cache=software_cache,
 )
 async def get_software(
     software_id: int,
@@ -324,8 +527,9 @@ async def get_software(
     app.patch,
     "/software",
     payload_key="software",
-    service_url=os.environ.get("AUTH_SERVICE_URL"),
+    service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("software",),
 )
 async def change_user_role(
     software: SoftwareUpdate,
@@ -340,8 +544,9 @@ async def change_user_role(
     app.delete,
     "/software/{software_id}",
     payload_key="",
-    service_url=os.environ.get("AUTH_SERVICE_URL"),
+    service_url=os.environ.get("LICENSE_SERVICE_URL"),
     access_level="USER_ROLE_MANAGEMENT",
+    invalidates=("software",),
 )
 def delete_user(
     software_id: int,
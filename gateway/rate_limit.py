@@ -0,0 +1,161 @@
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+import config
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = OSError
+
+SUBJECT = "subject"
+IP = "ip"
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens),
+           'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Rate limit exceeded",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_ip(request: Request) -> str:
+    if config.RATE_LIMIT_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[-1].strip()
+    if request.client is None:
+        return "unknown"
+    return request.client.host
+
+
+class RateLimit:
+    def __init__(self, name: str, rate: float, burst: int,
+                 key: str = SUBJECT):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+
+    def key_for(self, request: Request, claims: dict | None) -> str:
+        if self.key == SUBJECT and claims and claims.get("sub"):
+            return f"{self.name}:sub:{claims['sub']}"
+        return f"{self.name}:ip:{client_ip(request)}"
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, policy: RateLimit, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (policy.burst, now))
+        tokens = min(policy.burst, tokens + (now - updated_at) * policy.rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / policy.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._buckets)}
+
+
+class RedisBackend:
+    def __init__(self, url: str, fallback: MemoryBackend):
+        self.url = url
+        self.fallback = fallback
+        self.errors = 0
+        self._client = None
+        self._script = None
+
+    async def take(self, policy: RateLimit, key: str) -> float:
+        if self._client is None:
+            self._client = aioredis.from_url(
+                self.url, socket_timeout=config.RATE_LIMIT_REDIS_TIMEOUT)
+            self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+        try:
+            retry_after = await self._script(
+                keys=[f"rate_limit:{key}"], args=[policy.rate, policy.burst])
+            return float(retry_after)
+        except (RedisError, OSError):
+            self.errors += 1
+            return await self.fallback.take(policy, key)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors,
+                "fallback_keys": self.fallback.stats()["keys"]}
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = 0
+        self.rejected: dict[str, int] = {}
+
+    async def check(self, policy: RateLimit, request: Request,
+                    claims: dict | None = None):
+        retry_after = await self.backend.take(policy,
+                                              policy.key_for(request, claims))
+        if retry_after > 0:
+            self.rejected[policy.name] = self.rejected.get(policy.name, 0) + 1
+            raise too_many_requests(retry_after)
+        self.allowed += 1
+
+    async def close(self):
+        if isinstance(self.backend, RedisBackend):
+            await self.backend.close()
+
+    def stats(self) -> dict:
+        return {**self.backend.stats(), "allowed": self.allowed,
+                "rejected": self.rejected}
+
+
+def create_backend(name: str):
+    memory = MemoryBackend(config.RATE_LIMIT_MAX_KEYS)
+    if name == "redis":
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis "
+                               "package")
+        return RedisBackend(config.RATE_LIMIT_REDIS_URL, memory)
+    return memory
+
+
+rate_limiter = RateLimiter(create_backend(config.RATE_LIMIT_BACKEND))
@@ -0,0 +1,141 @@
+import asyncio
+import math
+import time
+from collections import deque
+from http import HTTPStatus
+
+from fastapi import HTTPException, status
+
+CRITICAL = "critical"
+BULK = "bulk"
+FAILURE_STATUSES = frozenset(code.value for code in HTTPStatus
+                             if 500 <= code.value < 600)
+
+
+def is_upstream_failure(status_code: int | None) -> bool:
+    return status_code is None or status_code in FAILURE_STATUSES
+
+
+def service_unavailable(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class Bulkhead:
+    def __init__(self, max_in_flight: int, max_queue: int,
+                 queue_timeout: float, reserved: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reserved = min(reserved, max_in_flight - 1)
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters = {CRITICAL: deque(), BULK: deque()}
+
+    def limit(self, priority: str) -> int:
+        if priority == CRITICAL:
+            return self.max_in_flight
+        return self.max_in_flight - self.reserved
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, priority: str):
+        waiters = self._waiters[priority]
+        if self.in_flight < self.limit(priority) and not waiters:
+            self.in_flight += 1
+            return
+        if priority != CRITICAL and self.queued >= self.max_queue:
+            self.shed += 1
+            raise service_unavailable("Upstream is overloaded",
+                                      self.queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            raise service_unavailable("Upstream queue timeout",
+                                      self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+    def release(self):
+        self.in_flight -= 1
+        for priority in (CRITICAL, BULK):
+            waiters = self._waiters[priority]
+            while waiters and self.in_flight < self.limit(priority):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self.in_flight += 1
+                    waiter.set_result(None)
+                    return
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "shed": self.shed,
+        }
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return False
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        self.rejected += 1
+        raise service_unavailable("Upstream circuit is open",
+                                  max(remaining, 1))
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN \
+                or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_abort(self):
+        self.probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+from token_cache import claims_scope
+
+
+class CachePolicy:
+    def __init__(self, group: str, ttl: float, max_entries: int = 128,
+                 vary_on_claims: bool = True):
+        self.group = group
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vary_on_claims = vary_on_claims
+
+    def key(self, url: str, claims: dict | None) -> tuple:
+        if not self.vary_on_claims:
+            return url, None
+        return url, claims_scope(claims)
+
+
+class ResponseCache:
+    def __init__(self):
+        self._groups: dict[str, OrderedDict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, policy: CachePolicy, key: tuple) -> Any | None:
+        entries = self._groups.get(policy.group)
+        entry = entries.get(key) if entries is not None else None
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                entries.move_to_end(key)
+                self.hits += 1
+                return data
+            del entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, policy: CachePolicy, key: tuple, data: Any):
+        entries = self._groups.setdefault(policy.group, OrderedDict())
+        entries[key] = (time.monotonic() + policy.ttl, data)
+        entries.move_to_end(key)
+        while len(entries) > policy.max_entries:
+            entries.popitem(last=False)
+
+    def invalidate(self, *groups: str):
+        for group in groups:
+            if self._groups.pop(group, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "groups": {group: len(entries)
+                       for group, entries in self._groups.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import deque
+
+from fastapi import HTTPException
+
+import config
+
+IDEMPOTENT_METHODS = ("get", "head", "options")
+RETRYABLE_STATUSES = (502, 503, 504)
+
+
+class RetryBudget:
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.hedges = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self.tokens,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "exhausted": self.exhausted,
+        }
+
+
+retry_budget = RetryBudget(config.RETRY_BUDGET_RATIO,
+                           config.RETRY_BUDGET_MAX_TOKENS)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 2, backoff: float = 0.05,
+                 hedge: bool = False, hedge_quantile: float = 0.95,
+                 hedge_min_delay: float = 0.01):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.latencies = deque(maxlen=config.HEDGE_LATENCY_WINDOW)
+
+    def hedge_delay(self) -> float | None:
+        if len(self.latencies) < config.HEDGE_MIN_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        index = min(len(latencies) - 1,
+                    int(len(latencies) * self.hedge_quantile))
+        return max(self.hedge_min_delay, latencies[index])
+
+    async def timed(self, call):
+        started_at = time.monotonic()
+        result = await call()
+        self.latencies.append(time.monotonic() - started_at)
+        return result
+
+    async def hedged(self, call):
+        first = asyncio.ensure_future(self.timed(call))
+        delay = self.hedge_delay()
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or not retry_budget.withdraw():
+            return await first
+
+        retry_budget.hedges += 1
+        pending = {first, asyncio.ensure_future(self.timed(call))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                answers = [task.result() for task in done
+                           if task.exception() is None]
+                if answers:
+                    for answer in answers[1:]:
+                        discard(answer)
+                    return answers[0]
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, call):
+        retry_budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                if self.hedge:
+                    result = await self.hedged(call)
+                else:
+                    result = await call()
+                if result[1] not in RETRYABLE_STATUSES \
+                        or attempt >= self.max_attempts \
+                        or not retry_budget.withdraw():
+                    return result
+                discard(result)
+            except HTTPException as e:
+                if e.status_code not in RETRYABLE_STATUSES \
+                        or attempt >= self.max_attempts \
+                        or not retry_budget.withdraw():
+                    raise
+            retry_budget.retries += 1
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            attempt += 1
+
+
+def discard(result):
+    close = getattr(result[0], "close", None)
+    if close is not None:
+        close()
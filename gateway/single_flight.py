@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable,
+                 call: Callable[[], Awaitable[Any]],
+                 discard: Callable[[Any], None] | None = None
+                 ) -> tuple[Any, bool]:
+        task = self._calls.get(key)
+        if task is not None:
+            self.followers += 1
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        task = asyncio.ensure_future(call())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        try:
+            return await asyncio.shield(task), False
+        except asyncio.CancelledError:
+            # The leader owns the result; nobody else will release it.
+            if discard is not None:
+                task.add_done_callback(
+                    lambda done: discard_result(done, discard))
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+
+def discard_result(task: asyncio.Task, discard: Callable[[Any], None]):
+    if not task.cancelled() and task.exception() is None:
+        discard(task.result())
+
+
+single_flight = SingleFlight()
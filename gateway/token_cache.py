@@ -0,0 +1,65 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+import jwt
+
+import config
+
+
+class TokenCache:
+    def __init__(self, max_size: int, max_ttl: float):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._tokens: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+        entry = self._tokens.get(key)
+        if entry is not None:
+            expires_at, claims = entry
+            if expires_at > now:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return claims
+            del self._tokens[key]
+
+        self.misses += 1
+        claims = jwt.decode(token,
+                            config.SECRET_KEY,
+                            algorithms=['HS256'],
+                            options={'verify_aud': True}
+                            )
+        expires_at = now + self.max_ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        if self.max_size > 0:
+            self._tokens[key] = (expires_at, claims)
+            if len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+        return claims
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._tokens),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def claims_scope(claims: dict | None):
+    if claims is None:
+        return None
+    if "acl" in claims:
+        return claims["acl"]
+    return tuple(sorted(claims.get("claims", [])))
+
+
+token_cache = TokenCache(config.TOKEN_CACHE_MAX_SIZE,
+                         config.TOKEN_CACHE_MAX_TTL)
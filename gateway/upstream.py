@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import aiohttp
+from yarl import URL
+
+import config
+from balancer import Replica, create_balancer
+from gateway_metrics import UPSTREAM_LATENCY
+from resilience import Bulkhead, CircuitBreaker, is_upstream_failure
+
+
+class Upstream:
+    def __init__(self, name: str, base_url: str):
+        self.name = name
+        self.base_url = base_url
+        self.replicas = [Replica(replica_url)
+                         for replica_url in base_url.split(",")
+                         if replica_url.strip()]
+        self.balancer = create_balancer(config.UPSTREAM_BALANCER)
+        self._health_task: asyncio.Task | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.bulkhead = Bulkhead(config.UPSTREAM_MAX_IN_FLIGHT,
+                                 config.UPSTREAM_MAX_QUEUE,
+                                 config.UPSTREAM_QUEUE_TIMEOUT,
+                                 config.UPSTREAM_RESERVED_SLOTS)
+        self.breaker = CircuitBreaker(config.CIRCUIT_FAILURE_THRESHOLD,
+                                      config.CIRCUIT_RESET_TIMEOUT)
+
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.UPSTREAM_LIMIT,
+                limit_per_host=config.UPSTREAM_LIMIT_PER_HOST,
+                keepalive_timeout=config.UPSTREAM_KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=config.UPSTREAM_DNS_CACHE_TTL,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=config.UPSTREAM_TOTAL_TIMEOUT,
+                connect=config.UPSTREAM_CONNECT_TIMEOUT,
+                sock_read=config.UPSTREAM_READ_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=timeout,
+                                                  auto_decompress=False)
+        return self._session
+
+    def pick(self) -> Replica:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        return self.balancer.pick(healthy or self.replicas)
+
+    def resolve(self, url: str) -> tuple[Replica, str]:
+        replica = self.pick()
+        return replica, replica.base_url + url[len(self.base_url):]
+
+    def record(self, replica: Replica, method: str, started_at: float,
+               status_code: int | None):
+        latency = time.monotonic() - started_at
+        replica.observe(latency, config.UPSTREAM_EWMA_DECAY)
+        UPSTREAM_LATENCY.labels(self.name, method,
+                                str(status_code or "error")).observe(latency)
+        self.mark(replica, not is_upstream_failure(status_code))
+
+    def mark(self, replica: Replica, ok: bool):
+        if ok:
+            replica.failures = 0
+            replica.successes += 1
+            if replica.successes >= config.HEALTH_CHECK_RISE:
+                replica.healthy = True
+        else:
+            replica.successes = 0
+            replica.failures += 1
+            if replica.failures >= config.HEALTH_CHECK_FALL:
+                replica.healthy = False
+
+    async def probe(self, replica: Replica):
+        try:
+            async with self.session().get(
+                    replica.base_url + config.HEALTH_CHECK_PATH,
+                    timeout=aiohttp.ClientTimeout(
+                        total=config.HEALTH_CHECK_TIMEOUT)) as response:
+                self.mark(replica, not is_upstream_failure(response.status))
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.mark(replica, False)
+
+    async def health_check(self):
+        while True:
+            await asyncio.gather(*(self.probe(replica)
+                                   for replica in self.replicas))
+            await asyncio.sleep(config.HEALTH_CHECK_INTERVAL)
+
+    def start(self):
+        self.session()
+        if config.HEALTH_CHECK_INTERVAL > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self.health_check())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        stats = {
+            "base_url": self.base_url,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "in_flight": self.in_flight,
+            "limit": config.UPSTREAM_LIMIT,
+            "limit_per_host": config.UPSTREAM_LIMIT_PER_HOST,
+            "active_connections": 0,
+            "idle_connections": 0,
+            "bulkhead": self.bulkhead.stats(),
+            "circuit": self.breaker.stats(),
+            "balancer": config.UPSTREAM_BALANCER,
+            "replicas": {replica.base_url: replica.stats()
+                         for replica in self.replicas},
+        }
+        if self._session is not None and not self._session.closed:
+            connector = self._session.connector
+            stats["active_connections"] = len(connector._acquired)
+            stats["idle_connections"] = sum(
+                len(conns) for conns in connector._conns.values())
+        return stats
+
+
+class UpstreamPool:
+    def __init__(self):
+        self.upstreams: dict[str, Upstream] = {}
+
+    def add(self, name: str, base_url: str | None):
+        if base_url:
+            self.upstreams[name] = Upstream(name, base_url)
+
+    def get(self, url: str) -> Upstream:
+        for upstream in self.upstreams.values():
+            if url.startswith(upstream.base_url):
+                return upstream
+        origin = str(URL(url).origin())
+        upstream = Upstream(origin, origin)
+        self.upstreams[origin] = upstream
+        return upstream
+
+    async def start(self):
+        for upstream in self.upstreams.values():
+            upstream.start()
+
+    async def close(self):
+        for upstream in self.upstreams.values():
+            await upstream.close()
+
+    def stats(self) -> dict:
+        return {name: upstream.stats()
+                for name, upstream in self.upstreams.items()}
+
+
+pool = UpstreamPool()
+pool.add("auth", config.AUTH_SERVICE_URL)
+pool.add("license", config.LICENSE_SERVICE_URL)
@@ -0,0 +1,78 @@
+import io
+import zipfile
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+import crud
+from conditional import etag_for
+from models import async_session
+from tracing import span
+
+
+class ZipStream(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def generate_license(lic, product_key: bytes):
+    lic_file_name, machine_digest_file_name = crud.form_file_name(lic)
+    lic = lic.model_copy()
+    license = crud.create_license(lic, machine_digest_file_name,
+                                  lic_file_name)
+    content = crud.build_license(lic, product_key.decode("utf-8"))
+    license.machine_digest_etag = etag_for(product_key)
+    license.lic_file_etag = etag_for(content)
+    files = [
+        (f"files/machine_digest_files/{machine_digest_file_name}",
+         product_key),
+        (f"files/licenses/{license.lic_file_name}", content),
+    ]
+    return license, content, files
+
+
+async def generate_licenses_zip(lic, digests: list[tuple[str, bytes]]):
+    stream = ZipStream()
+    generated = []
+    written = []
+    committed = False
+    try:
+        async with async_session() as db:
+            with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+                for filename, product_key in digests:
+                    license, content, files = await run_in_threadpool(
+                        generate_license, lic, product_key)
+                    db.add(license)
+                    with span("db.flush"):
+                        await db.flush()
+                    written.extend(path for path, _ in files)
+                    await run_in_threadpool(crud.write_files, files)
+                    generated.append((filename, license))
+                    archive.writestr(license.lic_file_name, content)
+                    yield stream.drain()
+
+                with span("db.commit"):
+                    await db.commit()
+                committed = True
+                archive.writestr("manifest.json", orjson.dumps(
+                    [{"id": license.id,
+                      "machine_digest_file": filename,
+                      "lic_file_name": license.lic_file_name}
+                     for filename, license in generated],
+                    option=orjson.OPT_INDENT_2))
+            yield stream.drain()
+    finally:
+        if not committed:
+            crud.remove_files(written)
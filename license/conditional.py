@@ -0,0 +1,70 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+
+def format_etag(digest) -> str:
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_for(content: bytes) -> str:
+    return format_etag(hashlib.sha256(content))
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str | None,
+                      last_modified: datetime | None) -> dict:
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str | None,
+                    last_modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        tags = [tag.strip().removeprefix("W/")
+                for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(etag: str | None, last_modified: datetime | None) -> Response:
+    return Response(status_code=304,
+                    headers=validator_headers(etag, last_modified))
+
+
+def conditional_json(request: Request, content,
+                     last_modified: datetime | None = None) -> Response:
+    response = ORJSONResponse(jsonable_encoder(content))
+    etag = etag_for(response.body)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    return response
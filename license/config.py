@@ -8,6 +8,16 @@ DB_PASS = os.environ.get("DB_PASS")
 DB_HOST = os.environ.get("DB_HOST")
 DB_PORT = os.environ.get("DB_PORT")
 DB_NAME = os.environ.get("DB_NAME")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 30))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 0))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+
+LICENSES_PAGE_DEFAULT_LIMIT = int(
+    os.environ.get("LICENSES_PAGE_DEFAULT_LIMIT", 100))
+LICENSES_PAGE_MAX_LIMIT = int(os.environ.get("LICENSES_PAGE_MAX_LIMIT", 1000))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+BULK_LICENSE_MAX_FILES = int(os.environ.get("BULK_LICENSE_MAX_FILES", 100))
 
 DB_HOST_TEST = os.environ.get("DB_HOST_TEST")
 DB_PORT_TEST = os.environ.get("DB_PORT_TEST")
@@ -16,3 +26,29 @@ DB_USER_TEST = os.environ.get("DB_USER_TEST")
 DB_PASS_TEST = os.environ.get("DB_PASS_TEST")
 
 LDAP_PASSWORD = os.environ.get("LDAP_PASSWORD")
+
+SERVICE_NAME = os.environ.get("SERVICE_NAME", "license")
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 2048))
+TRACE_FILE = os.environ.get("TRACE_FILE")
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED",
+                                       "true").lower() == "true"
+DIAGNOSTICS_ENABLED = os.environ.get("DIAGNOSTICS_ENABLED",
+                                     "false").lower() == "true"
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_THREAD_THRESHOLD = int(
+    os.environ.get("COMPRESSION_THREAD_THRESHOLD", 256 * 1024))
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0)) or \
+    len(os.sched_getaffinity(0))
+SERVER_LOOP = os.environ.get("SERVER_LOOP", "uvloop")
+SERVER_HTTP = os.environ.get("SERVER_HTTP", "httptools")
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 10000))
+SERVER_MAX_REQUESTS_JITTER = int(
+    os.environ.get("SERVER_MAX_REQUESTS_JITTER", 1000))
+SERVER_RELOAD = os.environ.get("SERVER_RELOAD", "false").lower() == "true"
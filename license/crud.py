@@ -1,12 +1,17 @@
+import hashlib
 import json
+import os
 import re
-import shutil
+import uuid
 from datetime import datetime
+from urllib.parse import quote
 
 import transliterate
 from fastapi import HTTPException
 
+from conditional import format_etag
 from models import Licenses
+from tracing import span
 
 
 def transliterate_license_filename(company_name, product_name,
@@ -17,62 +22,62 @@ def transliterate_license_filename(company_name, product_name,
     return english_letter
 
 
-def create_license(lic, machine_digest_file_name, lic_file_name):
+def parse_exp_time(exp_time):
     pattern = r"^\d{4}[-./ ](0[1-9]|1[0-2])[-./ ](0[1-9]|[12][0-9]|3[01])$"
-    print("DATE", lic.exp_time)
-    match = re.fullmatch(pattern, lic.exp_time)
+    match = re.fullmatch(pattern, exp_time)
     if match is None:
         raise HTTPException(status_code=422,
                             detail="Invalid license date format. Correct format is YYYY-MM-DD")
-    else:
-        lic.exp_time = datetime.strptime(f"{match[0]}", "%Y-%m-%d")
-
-        license = Licenses(
-            company_name=lic.company_name,
-            product_name=lic.product_name,
-            license_users_count=lic.license_users_count,
-            exp_time=lic.exp_time,
-            additional_license_information=lic.additional_license_information,
-            machine_digest_file=machine_digest_file_name,
-            lic_file_name=f"{lic_file_name}.txt",
-        )
+    return datetime.strptime(f"{match[0]}", "%Y-%m-%d")
+
+
+def create_license(lic, machine_digest_file_name, lic_file_name):
+    lic.exp_time = parse_exp_time(lic.exp_time)
+
+    license = Licenses(
+        company_name=lic.company_name,
+        product_name=lic.product_name,
+        license_users_count=lic.license_users_count,
+        exp_time=lic.exp_time,
+        additional_license_information=lic.additional_license_information,
+        machine_digest_file=machine_digest_file_name,
+        lic_file_name=f"{lic_file_name}.txt",
+    )
     return license
 
 
 def form_file_name(lic):
     today_date = datetime.now().strftime("%Y-%m-%d")
+    suffix = uuid.uuid4().hex
     lic_file_name = (
             transliterate_license_filename(
                 lic.company_name, lic.product_name, lic.license_users_count
             )
-            + f"_{lic.exp_time}"
+            + f"_{lic.exp_time}_{suffix}"
     )
     machine_digest_file_name = (
             transliterate_license_filename(
                 lic.company_name, lic.product_name, lic.license_users_count
             )
-            + f"_{today_date}"
+            + f"_{today_date}_{suffix}"
     )
     return lic_file_name, machine_digest_file_name
 
 
-def add_license_in_db(db, lic, machine_digest_file_name, lic_file_name):
-    license = create_license(lic, machine_digest_file_name, lic_file_name)
+async def add_license_in_db(db, license):
     db.add(license)
-    db.commit()
-    db.refresh(license)
-
+    with span("db.commit"):
+        await db.commit()
+    await db.refresh(license)
+    return license
 
-def save_machine_digest_file(machine_digest_file, machine_digest_file_name):
-    path = f"files/machine_digest_files/{machine_digest_file_name}"
-    with open(path, "wb+") as buffer:
-        shutil.copyfileobj(machine_digest_file.file, buffer)
 
+def file_etag(path):
+    with span("file.read", path=path), open(path, "rb") as f:
+        return format_etag(hashlib.file_digest(f, "sha256"))
 
-def save_license_file(lic, license_path, machine_digest_file_name, ):
-    path = f"files/machine_digest_files/{machine_digest_file_name}"
-    product_key = open(path, "r", encoding="utf-8").read()
 
+def build_license(lic, product_key):
     license_data = {
         "company": lic.company_name,
         "product_name": lic.product_name,
@@ -89,5 +94,30 @@ def save_license_file(lic, license_path, machine_digest_file_name, ):
             additional_info[key] = additional_license_information[key]
         license_data["additional_info"] = additional_info
 
-    with open(license_path, "w", encoding="utf-8") as f:
-        json.dump(license_data, f, ensure_ascii=False, indent=4)
+    return json.dumps(license_data, ensure_ascii=False,
+                      indent=4).encode("utf-8")
+
+
+def attachment_headers(filename):
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def write_file(path, content):
+    with span("file.write", path=path), open(path, "wb") as f:
+        f.write(content)
+
+
+def write_files(files):
+    for path, content in files:
+        write_file(path, content)
+
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
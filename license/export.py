@@ -0,0 +1,45 @@
+import csv
+import io
+
+import orjson
+from sqlalchemy import select
+
+import config
+from models import Licenses, async_session
+
+COLUMNS = list(Licenses.__table__.columns)
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def license_rows(filters: list):
+    statement = select(*COLUMNS).where(*filters).order_by(Licenses.id) \
+        .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+    async with async_session() as db:
+        result = await db.stream(statement)
+        async for rows in result.partitions():
+            yield rows
+
+
+def ndjson_chunk(rows) -> bytes:
+    return b"".join(orjson.dumps(row._asdict(),
+                                 option=orjson.OPT_APPEND_NEWLINE)
+                    for row in rows)
+
+
+def csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_licenses(filters: list, export_format: str):
+    if export_format == "csv":
+        encode = csv_chunk
+        yield csv_chunk([[column.name for column in COLUMNS]])
+    else:
+        encode = ndjson_chunk
+    async for rows in license_rows(filters):
+        yield encode(rows)
@@ -1,24 +1,46 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException
-from fastapi.responses import FileResponse
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, FastAPI, UploadFile, File, Depends, \
+    HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, ORJSONResponse, \
+    StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+import bulk
 import crud
+import export
+import pagination
+from compression import CompressionMiddleware
+from config import BULK_LICENSE_MAX_FILES, DIAGNOSTICS_ENABLED, \
+    LICENSES_PAGE_DEFAULT_LIMIT, LICENSES_PAGE_MAX_LIMIT
+from conditional import conditional_json, etag_for, is_not_modified, \
+    not_modified, validator_headers
+from metrics import MetricsMiddleware, metrics_response, register_engines
+from server_timing import ServerTimingMiddleware
+from tracing import TracingMiddleware, exporter, instrument_engine
 from dto.license_dto import LicensesInfo, SoftwareResponse, SoftwareCreate, \
     SoftwareUpdate
-from models import engine, Licenses, Base, Software
+from models import engine, async_engine, async_session, Licenses, Base, \
+    Software
 
-app = FastAPI(title="LicenseService")
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+app = FastAPI(title="LicenseService", default_response_class=ORJSONResponse)
+diagnostics = APIRouter()
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+register_engines(licenses=async_engine.sync_engine)
+instrument_engine(async_engine.sync_engine)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with async_session() as db:
         yield db
-    finally:
-        db.close()
 
 
 @app.on_event("startup")
@@ -26,57 +48,177 @@ async def startup():
     Base.metadata.create_all(bind=engine)
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await async_engine.dispose()
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@diagnostics.get("/metrics")
+def read_metrics():
+    return metrics_response()
+
+
+@diagnostics.get("/debug/traces")
+def read_traces(trace_id: str | None = None):
+    return exporter.recent(trace_id)
+
+
+if DIAGNOSTICS_ENABLED:
+    app.include_router(diagnostics)
+
+
 @app.post("/generate_license")
-def generate_license(lic: LicensesInfo = Depends(LicensesInfo.as_form),
-                     machine_digest_file: UploadFile = File(...),
-                     db: Session = Depends(get_db)):
+async def generate_license(lic: LicensesInfo = Depends(LicensesInfo.as_form),
+                           machine_digest_file: UploadFile = File(...),
+                           db: AsyncSession = Depends(get_db)):
     if machine_digest_file.content_type != "text/plain":
         raise HTTPException(status_code=400, detail="File type not supported")
 
+    files = []
     try:
         lic_file_name, machine_digest_file_name = crud.form_file_name(lic)
-        crud.add_license_in_db(db, lic, machine_digest_file_name, lic_file_name)
-        crud.save_machine_digest_file(machine_digest_file,
-                                      machine_digest_file_name)
-        license_path = f"files/licenses/{lic_file_name}.txt"
-        crud.save_license_file(lic, license_path, machine_digest_file_name)
+        license = crud.create_license(lic, machine_digest_file_name,
+                                      lic_file_name)
+        product_key = await machine_digest_file.read()
+        content = crud.build_license(lic, product_key.decode("utf-8"))
+        license.machine_digest_etag = etag_for(product_key)
+        license.lic_file_etag = etag_for(content)
+        files = [
+            (f"files/machine_digest_files/{machine_digest_file_name}",
+             product_key),
+            (f"files/licenses/{license.lic_file_name}", content),
+        ]
+        await run_in_threadpool(crud.write_files, files)
+        await crud.add_license_in_db(db, license)
 
         logger.bind(lic_file_name=lic_file_name).info("Создана лицензия")
 
-        f = FileResponse(license_path, filename=f"{lic_file_name}.txt")
+        f = Response(content, media_type="text/plain; charset=utf-8",
+                     headers={**crud.attachment_headers(license.lic_file_name),
+                              **validator_headers(license.lic_file_etag,
+                                                  license.created_at)})
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error - {str(e)} - {e.with_traceback()}")
+        logger.exception("Ошибка при создании лицензии")
+        crud.remove_files(path for path, _ in files)
         raise HTTPException(status_code=1337,
                             detail=f"Error - {str(e)}")
     return f
 
 
-@app.get("/all_licenses")
-def get_all_licenses(db: Session = Depends(get_db)):
-    all_licenses = db.query(Licenses).all()
+@app.post("/generate_licenses/bulk")
+async def generate_licenses_bulk(
+        lic: LicensesInfo = Depends(LicensesInfo.as_form),
+        machine_digest_files: List[UploadFile] = File(...)):
+    if len(machine_digest_files) > BULK_LICENSE_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_LICENSE_MAX_FILES} files per request")
+    if any(machine_digest_file.content_type != "text/plain"
+           for machine_digest_file in machine_digest_files):
+        raise HTTPException(status_code=400, detail="File type not supported")
 
-    if not all_licenses:
-        logger.info("Выведен пустой список лицензий")
-        return {
-            "all_licenses": [],
-        }
+    crud.parse_exp_time(lic.exp_time)
+    try:
+        crud.build_license(lic, "")
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid additional_license_information - {str(e)}")
+
+    digests = []
+    for machine_digest_file in machine_digest_files:
+        product_key = await machine_digest_file.read()
+        try:
+            product_key.decode("utf-8")
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{machine_digest_file.filename} is not UTF-8 text")
+        digests.append((machine_digest_file.filename, product_key))
+
+    logger.bind(count=len(digests)).info("Создан пакет лицензий")
+    return StreamingResponse(
+        bulk.generate_licenses_zip(lic, digests),
+        media_type="application/zip",
+        headers={"Content-Disposition":
+                 'attachment; filename="licenses.zip"'})
 
-    logger.info("Выведен список всех лицензий")
-    return {
-        "all_licenses": all_licenses,
+
+@app.get("/all_licenses")
+async def get_all_licenses(
+        request: Request,
+        company_name: str | None = None,
+        product_name: str | None = None,
+        exp_time_from: datetime | None = None,
+        exp_time_to: datetime | None = None,
+        sort: str = "id",
+        cursor: str | None = None,
+        limit: int = Query(LICENSES_PAGE_DEFAULT_LIMIT, ge=1,
+                           le=LICENSES_PAGE_MAX_LIMIT),
+        with_total: bool = False,
+        db: AsyncSession = Depends(get_db)):
+    filters = pagination.license_filters(company_name, product_name,
+                                         exp_time_from, exp_time_to)
+    rows = (await db.scalars(
+        pagination.page_query(filters, sort, cursor, limit))).all()
+    page = {
+        "all_licenses": rows[:limit],
+        "next_cursor": pagination.next_cursor(rows, sort, limit),
     }
+    if with_total:
+        page["total"] = await db.scalar(pagination.count_query(filters))
+
+    if not rows:
+        logger.info("Выведен пустой список лицензий")
+    else:
+        logger.info("Выведен список всех лицензий")
+    return conditional_json(request, page)
+
+
+@app.get("/licenses/export")
+async def export_licenses(
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        company_name: str | None = None,
+        product_name: str | None = None,
+        exp_time_from: datetime | None = None,
+        exp_time_to: datetime | None = None):
+    filters = pagination.license_filters(company_name, product_name,
+                                         exp_time_from, exp_time_to)
+    logger.info("Выгружен реестр лицензий")
+    return StreamingResponse(
+        export.export_licenses(filters, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition":
+                 f'attachment; filename="licenses.{format}"'})
 
 
 @app.get("/license/{license_id}")
-def find_license(license_id: int, db: Session = Depends(get_db)):
-    license_stmt = db.get(Licenses, license_id)
+async def find_license(license_id: int, request: Request,
+                       db: AsyncSession = Depends(get_db)):
+    license_stmt = await db.get(Licenses, license_id)
     _logger = logger.bind(id=license_id)
 
     if license_stmt is not None:
         license_path = f"files/licenses/{license_stmt.lic_file_name}"
+        if license_stmt.lic_file_etag is None:
+            license_stmt.lic_file_etag = await run_in_threadpool(
+                crud.file_etag, license_path)
+            await db.commit()
+        etag = license_stmt.lic_file_etag
+        last_modified = license_stmt.created_at
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
         _logger.info("Выведена информация о лицензии с id")
         return FileResponse(license_path,
-                            filename=f"{license_stmt.lic_file_name}")
+                            filename=f"{license_stmt.lic_file_name}",
+                            headers=validator_headers(etag, last_modified))
     else:
         _logger.error("Попытка найти информацию о несуществующей лицензии с id")
         raise HTTPException(status_code=404,
@@ -84,15 +226,25 @@ def find_license(license_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/machine_digest_file/{license_id}")
-def find_machine_digest(license_id: int, db: Session = Depends(get_db)):
-    license_client = db.get(Licenses, license_id)
+async def find_machine_digest(license_id: int, request: Request,
+                              db: AsyncSession = Depends(get_db)):
+    license_client = await db.get(Licenses, license_id)
     _logger = logger.bind(id=license_id)
 
     if license_client is not None:
         digest_path = f"files/machine_digest_files/{license_client.machine_digest_file}"
+        if license_client.machine_digest_etag is None:
+            license_client.machine_digest_etag = await run_in_threadpool(
+                crud.file_etag, digest_path)
+            await db.commit()
+        etag = license_client.machine_digest_etag
+        last_modified = license_client.created_at
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
         _logger.info("Выведена информация о машинном файле с id")
         return FileResponse(digest_path,
-                            filename=f"{license_client.machine_digest_file}")
+                            filename=f"{license_client.machine_digest_file}",
+                            headers=validator_headers(etag, last_modified))
     else:
         _logger.error(
             "Попытка найти информацию о несуществующем машинном файле с id")
@@ -101,36 +253,40 @@ def find_machine_digest(license_id: int, db: Session = Depends(get_db)):
 
 
 @app.post("/software", response_model=SoftwareResponse)
-def create_software(software: SoftwareCreate, db: Session = Depends(get_db)):
+async def create_software(software: SoftwareCreate,
+                          db: AsyncSession = Depends(get_db)):
     new_software = Software(
         company_name=software.company_name,
         required_attributes=software.required_attributes,
         license_generator_path=software.license_generator_path
     )
     db.add(new_software)
-    db.commit()
-    db.refresh(new_software)
+    await db.commit()
+    await db.refresh(new_software)
     return new_software
 
 
 @app.get("/software", response_model=List[SoftwareResponse])
-def get_softwares(db: Session = Depends(get_db)):
-    softwares = db.query(Software).all()
-    return softwares
+async def get_softwares(request: Request,
+                        db: AsyncSession = Depends(get_db)):
+    softwares = (await db.scalars(select(Software))).all()
+    return conditional_json(request, [SoftwareResponse.model_validate(software)
+                                      for software in softwares])
 
 
 @app.get("/software/{software_id}", response_model=SoftwareResponse)
-def get_software(software_id: int, db: Session = Depends(get_db)):
-    software = db.query(Software).filter(Software.id == software_id).first()
+async def get_software(software_id: int, request: Request,
+                       db: AsyncSession = Depends(get_db)):
+    software = await db.get(Software, software_id)
     if not software:
         raise HTTPException(status_code=404, detail="Software not found")
-    return software
+    return conditional_json(request, SoftwareResponse.model_validate(software))
 
 
 @app.patch("/software", response_model=SoftwareResponse)
-def update_software(software: SoftwareUpdate, db: Session = Depends(get_db)):
-    existing_software = db.query(Software).filter(
-        Software.id == software.id).first()
+async def update_software(software: SoftwareUpdate,
+                          db: AsyncSession = Depends(get_db)):
+    existing_software = await db.get(Software, software.id)
     if not existing_software:
         raise HTTPException(status_code=404, detail="Software not found")
 
@@ -142,19 +298,20 @@ def update_software(software: SoftwareUpdate, db: Session = Depends(get_db)):
         path = software.license_generator_path
         existing_software.license_generator_path = path
 
-    db.commit()
-    db.refresh(existing_software)
+    await db.commit()
+    await db.refresh(existing_software)
     return existing_software
 
 
 @app.delete("/software/{software_id}")
-def delete_software(software_id: int, db: Session = Depends(get_db)):
-    software = db.query(Software).filter(Software.id == software_id).first()
+async def delete_software(software_id: int,
+                          db: AsyncSession = Depends(get_db)):
+    software = await db.get(Software, software_id)
     if not software:
         raise HTTPException(status_code=404, detail="Software not found")
 
-    db.delete(software)
-    db.commit()
+    await db.delete(software)
+    await db.commit()
     return {"detail": "Software deleted successfully"}
 
 
@@ -0,0 +1,50 @@
+"""License listing indexes
+
+Revision ID: 4c7e1b9a2d53
+Revises: 9d3f2a7c41b6
+Create Date: 2026-10-18 14:37:05.512903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e1b9a2d53'
+down_revision: Union[str, None] = '9d3f2a7c41b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_LicensesInfo_company_name_id": ["company_name", "id"],
+    "ix_LicensesInfo_product_name_id": ["product_name", "id"],
+    "ix_LicensesInfo_exp_time_id": ["exp_time", "id"],
+    "ix_LicensesInfo_created_at_id": ["created_at", "id"],
+}
+
+
+def license_indexes() -> set[str] | None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("LicensesInfo"):
+        return None
+    return {index["name"] for index in inspector.get_indexes("LicensesInfo")}
+
+
+def upgrade() -> None:
+    indexes = license_indexes()
+    if indexes is None:
+        return
+    for name, columns in INDEXES.items():
+        if name not in indexes:
+            op.create_index(name, "LicensesInfo", columns)
+
+
+def downgrade() -> None:
+    indexes = license_indexes()
+    if indexes is None:
+        return
+    for name in INDEXES:
+        if name in indexes:
+            op.drop_index(name, table_name="LicensesInfo")
@@ -0,0 +1,50 @@
+"""License file validators
+
+Revision ID: 9d3f2a7c41b6
+Revises: 
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f2a7c41b6'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def license_columns() -> set[str] | None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("LicensesInfo"):
+        return None
+    return {column["name"] for column in inspector.get_columns("LicensesInfo")}
+
+
+def upgrade() -> None:
+    columns = license_columns()
+    if columns is None:
+        return
+    if "lic_file_etag" not in columns:
+        op.add_column("LicensesInfo",
+                      sa.Column("lic_file_etag", sa.String(), nullable=True))
+    if "machine_digest_etag" not in columns:
+        op.add_column("LicensesInfo",
+                      sa.Column("machine_digest_etag", sa.String(),
+                                nullable=True))
+    if "created_at" not in columns:
+        op.add_column("LicensesInfo",
+                      sa.Column("created_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    columns = license_columns()
+    if columns is None:
+        return
+    for column in ("created_at", "machine_digest_etag", "lic_file_etag"):
+        if column in columns:
+            op.drop_column("LicensesInfo", column)
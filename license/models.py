@@ -1,13 +1,39 @@
-from datetime import date
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import Column, Integer, String, DateTime, ARRAY
+from sqlalchemy import Column, Integer, String, DateTime, ARRAY, Index
 from sqlalchemy import create_engine
-from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, \
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_STATEMENT_CACHE_SIZE
 
 sqlite_database = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 engine = create_engine(sqlite_database, pool_pre_ping=True, echo=False)
 
+async_database = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}" \
+    f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}"
+async_engine = create_async_engine(
+    async_database,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    echo=False,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False,
+                                       expire_on_commit=False)
+db_admission = asyncio.Semaphore(DB_POOL_SIZE)
+
+
+@asynccontextmanager
+async def async_session():
+    async with db_admission:
+        async with AsyncSessionLocal() as db:
+            yield db
+
 
 class Base(DeclarativeBase):
     pass
@@ -15,6 +41,12 @@ class Base(DeclarativeBase):
 
 class Licenses(Base):
     __tablename__ = "LicensesInfo"
+    __table_args__ = (
+        Index("ix_LicensesInfo_company_name_id", "company_name", "id"),
+        Index("ix_LicensesInfo_product_name_id", "product_name", "id"),
+        Index("ix_LicensesInfo_exp_time_id", "exp_time", "id"),
+        Index("ix_LicensesInfo_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, nullable=False)
     company_name = Column(String)
@@ -24,6 +56,9 @@ class Licenses(Base):
     additional_license_information = Column(String)
     machine_digest_file = Column(String)
     lic_file_name = Column(String)
+    lic_file_etag = Column(String, nullable=True)
+    machine_digest_etag = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class Software(Base):
@@ -34,5 +69,3 @@ class Software(Base):
     required_attributes = Column(ARRAY(String), nullable=True)
     license_generator_path = Column(String, nullable=True)
 
-
-Base.metadata.create_all(bind=engine)
@@ -0,0 +1,106 @@
+import base64
+from datetime import datetime
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select
+
+from models import Licenses
+
+SORT_COLUMNS = {
+    "id": Licenses.id,
+    "exp_time": Licenses.exp_time,
+    "created_at": Licenses.created_at,
+}
+
+
+def parse_sort(sort: str) -> tuple[str, bool]:
+    descending = sort.startswith("-")
+    name = sort.removeprefix("-")
+    if name not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported sort '{sort}', expected one of "
+                   f"{', '.join(SORT_COLUMNS)} with an optional '-' prefix")
+    return name, descending
+
+
+def encode_cursor(sort: str, value, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = orjson.dumps([sort, value, row_id])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, row_id = orjson.loads(payload)
+        if cursor_sort != sort or not isinstance(row_id, int):
+            raise ValueError("cursor does not match sort")
+        name, _ = parse_sort(sort)
+        if name != "id" and value is not None:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid cursor")
+    return value, row_id
+
+
+def after(column, descending: bool, value, row_id: int):
+    # Postgres sorts NULLs last ascending and first descending; the
+    # predicate mirrors that so rows with a NULL sort key are not skipped.
+    if column is Licenses.id:
+        return Licenses.id < row_id if descending else Licenses.id > row_id
+    if descending:
+        if value is None:
+            return or_(column.is_not(None),
+                       and_(column.is_(None), Licenses.id < row_id))
+        return or_(column < value,
+                   and_(column == value, Licenses.id < row_id))
+    if value is None:
+        return and_(column.is_(None), Licenses.id > row_id)
+    return or_(column > value, column.is_(None),
+               and_(column == value, Licenses.id > row_id))
+
+
+def license_filters(company_name: str | None, product_name: str | None,
+                    exp_time_from: datetime | None,
+                    exp_time_to: datetime | None) -> list:
+    filters = []
+    if company_name is not None:
+        filters.append(Licenses.company_name == company_name)
+    if product_name is not None:
+        filters.append(Licenses.product_name == product_name)
+    if exp_time_from is not None:
+        filters.append(Licenses.exp_time >= exp_time_from)
+    if exp_time_to is not None:
+        filters.append(Licenses.exp_time <= exp_time_to)
+    return filters
+
+
+def page_query(filters: list, sort: str, cursor: str | None, limit: int):
+    name, descending = parse_sort(sort)
+    column = SORT_COLUMNS[name]
+    where = list(filters)
+    if cursor is not None:
+        where.append(after(column, descending, *decode_cursor(cursor, sort)))
+    if name == "id":
+        order_by = [column.desc() if descending else column.asc()]
+    elif descending:
+        order_by = [column.desc(), Licenses.id.desc()]
+    else:
+        order_by = [column.asc(), Licenses.id.asc()]
+    return select(Licenses).where(*where).order_by(*order_by).limit(limit + 1)
+
+
+def count_query(filters: list):
+    return select(func.count()).select_from(Licenses).where(*filters)
+
+
+def next_cursor(rows: list, sort: str, limit: int) -> str | None:
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    name, _ = parse_sort(sort)
+    return encode_cursor(sort, getattr(last, name), last.id)
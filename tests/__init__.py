@@ -0,0 +1,17 @@
+import importlib
+import sys
+
+from gateway import config as gateway_config
+
+
+def import_gateway_module(name: str):
+    # Gateway and license modules both import a top-level ``config``.
+    saved = sys.modules.get("config")
+    sys.modules["config"] = gateway_config
+    try:
+        return importlib.import_module(f"gateway.{name}")
+    finally:
+        if saved is None:
+            del sys.modules["config"]
+        else:
+            sys.modules["config"] = saved
@@ -0,0 +1,50 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "license"))
+
+from conditional import is_not_modified  # noqa: E402
+
+LAST_MODIFIED = datetime(2024, 1, 1, 0, 0, 0, 500000)
+
+
+def request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode())
+                    for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("since, expected", [
+    ("Mon, 01 Jan 2024 00:00:00 GMT", True),
+    ("Mon, 01 Jan 2024 00:00:00 -0000", True),
+    ("Mon, 01 Jan 2024 01:00:00 +0100", True),
+    ("Sun, 31 Dec 2023 23:59:59 -0000", False),
+    ("not a date", False),
+])
+def test_if_modified_since(since, expected):
+    assert is_not_modified(request(if_modified_since=since), None,
+                           LAST_MODIFIED) is expected
+
+
+def test_aware_last_modified():
+    last_modified = LAST_MODIFIED.replace(tzinfo=timezone.utc)
+    assert is_not_modified(
+        request(if_modified_since="Mon, 01 Jan 2024 00:00:00 -0000"),
+        None, last_modified)
+
+
+def test_if_none_match_takes_precedence():
+    assert is_not_modified(request(if_none_match='W/"a", "b"'), '"a"',
+                           LAST_MODIFIED)
+    assert not is_not_modified(
+        request(if_none_match='"b"',
+                if_modified_since="Mon, 01 Jan 2024 00:00:00 GMT"),
+        '"a"', LAST_MODIFIED)
@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+from fastapi.responses import StreamingResponse
+
+from tests import import_gateway_module
+
+download_cache = import_gateway_module("download_cache")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def response(*chunks: bytes, etag: str = '"v1"') -> StreamingResponse:
+    return StreamingResponse(body(*chunks), media_type="text/plain",
+                             headers={"ETag": etag})
+
+
+def cache_for(tmp_path, max_bytes: int = 1024):
+    cache = download_cache.DownloadCache(str(tmp_path), max_bytes)
+    cache.open()
+    return cache
+
+
+def test_entry_appears_only_after_the_stream_completes(tmp_path):
+    async def scenario():
+        cache = cache_for(tmp_path)
+        streamed = response(b"lic", b"ense")
+        cache.store("/license/1", streamed)
+
+        chunks = streamed.body_iterator
+        assert await chunks.__anext__() == b"lic"
+        assert cache.get("/license/1") is None
+        files = os.listdir(cache.directory)
+        assert len(files) == 1 and files[0].endswith(".part")
+
+        assert [chunk async for chunk in chunks] == [b"ense"]
+        entry = cache.get("/license/1")
+        assert entry.etag == '"v1"'
+        assert os.listdir(cache.directory) == [os.path.basename(entry.path)]
+        with open(entry.path, "rb") as f:
+            assert f.read() == b"license"
+
+    run(scenario())
+
+
+def test_aborted_stream_leaves_no_entry_or_part_file(tmp_path):
+    async def scenario():
+        cache = cache_for(tmp_path)
+        streamed = response(b"lic", b"ense")
+        cache.store("/license/1", streamed)
+
+        chunks = streamed.body_iterator
+        await chunks.__anext__()
+        await chunks.aclose()
+        assert cache.get("/license/1") is None
+        assert os.listdir(cache.directory) == []
+
+    run(scenario())
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    async def scenario():
+        cache = cache_for(tmp_path, max_bytes=10)
+        for url in ("/license/1", "/license/2"):
+            streamed = response(b"sixsix")
+            cache.store(url, streamed)
+            async for _ in streamed.body_iterator:
+                pass
+
+        assert cache.get("/license/1") is None
+        entry = cache.get("/license/2")
+        assert os.listdir(cache.directory) == [os.path.basename(entry.path)]
+        assert cache.stats()["evictions"] == 1
+        assert cache.size == 6
+
+    run(scenario())
+
+
+def test_weak_etag_is_not_cached(tmp_path):
+    cache = cache_for(tmp_path)
+    streamed = response(b"license", etag='W/"v1"')
+    original = streamed.body_iterator
+    cache.store("/license/1", streamed)
+    assert streamed.body_iterator is original
+    assert cache.stats()["misses"] == 0
@@ -0,0 +1,93 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "license"))
+
+import pagination  # noqa: E402
+from models import Licenses  # noqa: E402
+
+EXP_TIMES = [datetime(2030, 1, 1), None, datetime(2029, 1, 1), None,
+             datetime(2030, 1, 1), datetime(2031, 1, 1)]
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://")
+    Licenses.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(Licenses.__table__.insert(), [
+            {"id": row_id, "exp_time": exp_time}
+            for row_id, exp_time in enumerate(EXP_TIMES, 1)])
+    with Session(engine) as session:
+        yield session
+
+
+def postgres_order(descending: bool) -> list[tuple]:
+    # NULLS LAST ascending, NULLS FIRST descending, ties broken by id.
+    rows = sorted(enumerate(EXP_TIMES, 1),
+                  key=lambda row: (row[1] is None, row[1] or datetime.min,
+                                   row[0]))
+    rows = [(exp_time, row_id) for row_id, exp_time in rows]
+    return rows[::-1] if descending else rows
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_after_follows_postgres_null_ordering(db, descending):
+    ordered = postgres_order(descending)
+    for position, (exp_time, row_id) in enumerate(ordered):
+        predicate = pagination.after(Licenses.exp_time, descending,
+                                     exp_time, row_id)
+        found = set(db.scalars(select(Licenses.id).where(predicate)))
+        assert found == {row_id for _, row_id in ordered[position + 1:]}
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_after_on_id(db, descending):
+    predicate = pagination.after(Licenses.id, descending, 3, 3)
+    found = set(db.scalars(select(Licenses.id).where(predicate)))
+    assert found == ({1, 2} if descending else {4, 5, 6})
+
+
+@pytest.mark.parametrize("sort, value", [
+    ("id", 7),
+    ("-exp_time", datetime(2030, 1, 1, 12, 30)),
+    ("created_at", None),
+])
+def test_cursor_round_trip(sort, value):
+    cursor = pagination.encode_cursor(sort, value, 7)
+    assert "=" not in cursor
+    assert pagination.decode_cursor(cursor, sort) == (value, 7)
+
+
+@pytest.mark.parametrize("cursor", [
+    pagination.encode_cursor("exp_time", None, 1),
+    "not base64!",
+    "e30",
+    pagination.encode_cursor("-exp_time", "yesterday", 1),
+    pagination.encode_cursor("-exp_time", None, "1"),
+])
+def test_decode_cursor_rejects_invalid_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor(cursor, "-exp_time")
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
+
+
+def test_next_cursor():
+    rows = [Licenses(id=row_id, exp_time=exp_time)
+            for row_id, exp_time in enumerate(EXP_TIMES, 1)]
+    assert pagination.next_cursor(rows[:3], "exp_time", 3) is None
+    cursor = pagination.next_cursor(rows[:4], "exp_time", 3)
+    assert pagination.decode_cursor(cursor, "exp_time") == (EXP_TIMES[2], 3)
+
+
+def test_unsupported_sort():
+    with pytest.raises(HTTPException) as error:
+        pagination.parse_sort("company_name")
+    assert error.value.status_code == 400
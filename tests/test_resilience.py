@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from gateway import resilience
+from gateway.resilience import BULK, CRITICAL, Bulkhead, CircuitBreaker, \
+    is_upstream_failure
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_bulk_requests_leave_reserved_slots_for_critical():
+    async def scenario():
+        bulkhead = Bulkhead(max_in_flight=3, max_queue=10,
+                            queue_timeout=0.05, reserved=1)
+        await bulkhead.acquire(BULK)
+        await bulkhead.acquire(BULK)
+        with pytest.raises(HTTPException) as error:
+            await bulkhead.acquire(BULK)
+        assert error.value.status_code == 503
+        await bulkhead.acquire(CRITICAL)
+        assert bulkhead.in_flight == 3
+        assert bulkhead.queued == 0
+
+    run(scenario())
+
+
+def test_queue_timeout_sheds_and_leaves_no_waiter():
+    async def scenario():
+        bulkhead = Bulkhead(max_in_flight=1, max_queue=10,
+                            queue_timeout=0.01, reserved=0)
+        await bulkhead.acquire(BULK)
+        with pytest.raises(HTTPException) as error:
+            await bulkhead.acquire(BULK)
+        assert error.value.detail == "Upstream queue timeout"
+        assert bulkhead.shed == 1
+        assert bulkhead.queued == 0
+        assert bulkhead.in_flight == 1
+
+    run(scenario())
+
+
+def test_full_queue_sheds_bulk_but_queues_critical():
+    async def scenario():
+        bulkhead = Bulkhead(max_in_flight=1, max_queue=1,
+                            queue_timeout=1, reserved=0)
+        await bulkhead.acquire(BULK)
+        queued = asyncio.create_task(bulkhead.acquire(BULK))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await bulkhead.acquire(BULK)
+        assert error.value.detail == "Upstream is overloaded"
+        critical = asyncio.create_task(bulkhead.acquire(CRITICAL))
+        await asyncio.sleep(0)
+        assert bulkhead.queued == 2
+
+        bulkhead.release()
+        await critical
+        assert not queued.done()
+        bulkhead.release()
+        await queued
+        assert bulkhead.in_flight == 1
+
+    run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        bulkhead = Bulkhead(max_in_flight=1, max_queue=10,
+                            queue_timeout=1, reserved=0)
+        await bulkhead.acquire(BULK)
+        waiter = asyncio.create_task(bulkhead.acquire(BULK))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert bulkhead.queued == 0
+        bulkhead.release()
+        assert bulkhead.in_flight == 0
+
+    run(scenario())
+
+
+def test_waiter_cancelled_after_grant_keeps_slot_accounting():
+    async def scenario():
+        bulkhead = Bulkhead(max_in_flight=1, max_queue=10,
+                            queue_timeout=1, reserved=0)
+        await bulkhead.acquire(BULK)
+        waiter = asyncio.create_task(bulkhead.acquire(BULK))
+        await asyncio.sleep(0)
+        bulkhead.release()
+        waiter.cancel()
+        try:
+            await waiter
+            acquired = True
+        except asyncio.CancelledError:
+            acquired = False
+        assert bulkhead.in_flight == (1 if acquired else 0)
+
+    run(scenario())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_circuit_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(HTTPException) as error:
+        breaker.allow()
+    assert error.value.status_code == 503
+    assert breaker.rejected == 1
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(HTTPException):
+        breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() is False
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(HTTPException):
+        breaker.allow()
+
+
+def test_aborted_probe_lets_the_next_request_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow() is True
+    breaker.record_abort()
+    assert breaker.allow() is True
+
+
+@pytest.mark.parametrize("status_code, failure", [
+    (None, True), (500, True), (502, True), (503, True), (504, True),
+    (599, False), (1337, False), (404, False), (200, False),
+])
+def test_standard_server_errors_count_as_upstream_failures(status_code,
+                                                           failure):
+    assert is_upstream_failure(status_code) is failure
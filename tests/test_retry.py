@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from tests import import_gateway_module
+
+retry = import_gateway_module("retry")
+
+
+class Stream:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    budget = retry.RetryBudget(ratio=0.5, max_tokens=1)
+    monkeypatch.setattr(retry, "retry_budget", budget)
+    return budget
+
+
+def hedging_policy() -> retry.RetryPolicy:
+    policy = retry.RetryPolicy(hedge=True, hedge_min_delay=0.01)
+    policy.latencies.extend([0.001] * retry.config.HEDGE_MIN_SAMPLES)
+    return policy
+
+
+def test_budget_is_capped_and_counts_exhaustion():
+    budget = retry.RetryBudget(ratio=0.5, max_tokens=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    budget.deposit()
+    assert budget.tokens == 1
+    assert budget.stats()["exhausted"] == 2
+
+
+def test_retry_discards_the_failed_response(budget):
+    async def scenario():
+        results = [(Stream(), 503), (Stream(), 200)]
+        attempts = iter(results)
+
+        async def call():
+            return next(attempts)
+
+        policy = retry.RetryPolicy(max_attempts=2, backoff=0)
+        assert await policy.call(call) == results[1]
+        assert results[0][0].closed and not results[1][0].closed
+        assert budget.retries == 1
+
+    run(scenario())
+
+
+def test_exhausted_budget_returns_the_first_failure(budget):
+    async def scenario():
+        budget.tokens = 0
+        stream = Stream()
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            return stream, 503
+
+        policy = retry.RetryPolicy(max_attempts=3, backoff=0)
+        assert await policy.call(call) == (stream, 503)
+        assert len(attempts) == 1
+        assert not stream.closed
+        assert budget.exhausted == 1
+
+    run(scenario())
+
+
+def test_exhausted_budget_reraises_a_retryable_error(budget):
+    async def scenario():
+        budget.tokens = 0
+
+        async def call():
+            raise HTTPException(status_code=502)
+
+        with pytest.raises(HTTPException) as error:
+            await retry.RetryPolicy(max_attempts=3, backoff=0).call(call)
+        assert error.value.status_code == 502
+        assert budget.retries == 0
+
+    run(scenario())
+
+
+def test_hedge_cancels_the_slow_attempt(budget):
+    async def scenario():
+        slow_cancelled = asyncio.Event()
+        fast = Stream()
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    slow_cancelled.set()
+                    raise
+            return fast, 200
+
+        assert await hedging_policy().call(call) == (fast, 200)
+        await asyncio.wait_for(slow_cancelled.wait(), 1)
+        assert budget.hedges == 1
+        assert not fast.closed
+
+    run(scenario())
+
+
+def test_hedge_discards_the_losing_stream(budget):
+    async def scenario():
+        release = asyncio.Event()
+        streams = []
+
+        async def call():
+            stream = Stream()
+            streams.append(stream)
+            if len(streams) == 2:
+                release.set()
+            await release.wait()
+            return stream, 200
+
+        winner, _ = await hedging_policy().call(call)
+        assert len(streams) == 2
+        loser = streams[1] if winner is streams[0] else streams[0]
+        assert loser.closed and not winner.closed
+
+    run(scenario())
+
+
+def test_hedge_without_budget_waits_for_the_first_attempt(budget):
+    async def scenario():
+        budget.tokens = 0
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            await asyncio.sleep(0.05)
+            return Stream(), 200
+
+        await hedging_policy().call(call)
+        assert len(attempts) == 1
+        assert budget.hedges == 0
+
+    run(scenario())
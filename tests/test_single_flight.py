@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from gateway.single_flight import SingleFlight
+
+
+class Stream:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def discard(result):
+    result[0].close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_followers_share_the_leaders_result():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "body", 200
+
+        leader = asyncio.create_task(flights.do("key", call, discard))
+        follower = asyncio.create_task(flights.do("key", call, discard))
+        await asyncio.sleep(0)
+        release.set()
+        assert await leader == (("body", 200), False)
+        assert await follower == (("body", 200), True)
+        assert flights.stats() == {"in_flight": 0, "leaders": 1,
+                                   "followers": 1}
+
+    run(scenario())
+
+
+def test_cancelled_leader_discards_the_result():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        stream = Stream()
+
+        async def call():
+            await release.wait()
+            return stream, 200
+
+        leader = asyncio.create_task(flights.do("key", call, discard))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert not stream.closed
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert stream.closed
+        assert flights.stats()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_cancelled_leader_ignores_a_failed_call():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        discarded = []
+
+        async def call():
+            await release.wait()
+            raise RuntimeError("upstream failed")
+
+        leader = asyncio.create_task(flights.do("key", call,
+                                                discarded.append))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert discarded == []
+
+    run(scenario())